@@ -0,0 +1,38 @@
+"""Access path indexes
+
+Revision ID: 5b8c3f2e9a71
+Revises: 2ed5696f5d3b
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8c3f2e9a71'
+down_revision: Union[str, None] = '2ed5696f5d3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # admin/worker/client.user_id ya están cubiertos por su UNIQUE constraint
+    op.create_index('ix_activity_project_id_created_at', 'activity', ['project_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_task_project_id'), 'task', ['project_id'], unique=False)
+    op.create_index(op.f('ix_expense_project_id'), 'expense', ['project_id'], unique=False)
+    op.create_index('ix_inventoryitem_project_id_name', 'inventoryitem', ['project_id', 'name'], unique=False)
+    op.create_index('ix_follow_following_id_status', 'follow', ['following_id', 'status'], unique=False)
+    op.create_index(op.f('ix_projectclient_client_id'), 'projectclient', ['client_id'], unique=False)
+    op.create_index(op.f('ix_projectteamlink_worker_id'), 'projectteamlink', ['worker_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_projectteamlink_worker_id'), table_name='projectteamlink')
+    op.drop_index(op.f('ix_projectclient_client_id'), table_name='projectclient')
+    op.drop_index('ix_follow_following_id_status', table_name='follow')
+    op.drop_index('ix_inventoryitem_project_id_name', table_name='inventoryitem')
+    op.drop_index(op.f('ix_expense_project_id'), table_name='expense')
+    op.drop_index(op.f('ix_task_project_id'), table_name='task')
+    op.drop_index('ix_activity_project_id_created_at', table_name='activity')
@@ -1,9 +1,16 @@
+import logging
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlmodel import Session
-from app.models.user import User, UserOut, UserRole
+from sqlmodel import Session, select
+from app.models.project import Project
+from app.models.project_client import ProjectClient
+from app.models.project_team import ProjectTeamLink
+from app.models.user import Admin, Client, User, UserOut, UserRole, Worker
 from app.crud.user import get_user, get_user_by_id, get_user_by_username
+from app.core.cache import principal_cache
 from app.core.config import settings
 from app.core.database import get_session
 from app.core.security import ALGORITHM
@@ -15,8 +22,14 @@ credentials_exception = HTTPException(
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token")
 
+logger = logging.getLogger(__name__)
+
 
 def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> UserOut:
+    # Usuario ya validado con este token: se evita decodificar el JWT y consultar la BD
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user.model_copy()
 
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
@@ -30,12 +43,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     user = get_user(session=session, user_id=user_id)
     if user is None:
         raise credentials_exception
-    return user
+
+    # Nunca cachear más allá de la caducidad del propio token
+    expires_in = payload.get("exp", 0) - time.time()
+    principal_cache.set(token, user, ttl=expires_in)
+    # Las rutas modifican el usuario devuelto (followers, role data...), se entrega una copia
+    return user.model_copy()
 
 def get_worker_client_permission(
         current_user: UserOut = Depends(get_current_user)
 ):
-    print(f"--------------------------------------|||||| Current user role: {current_user.role}")
+    logger.debug("Current user role: %s", current_user.role)
     if current_user.role == UserRole.WORKER or current_user.role == UserRole.CLIENT:
         return current_user
     else:
@@ -65,3 +83,25 @@ async def get_admin_or_worker_permissions(
         return current_user
     else:
         raise HTTPException(status_code=400, detail="The user doesn't have enough privileges")
+
+
+def get_project_member(
+        project_id: int,
+        current_user: UserOut = Depends(get_current_user),
+        session: Session = Depends(get_session)
+):
+    """El usuario debe pertenecer al proyecto: su admin, uno de sus clientes o un worker del equipo."""
+    if session.get(Project, project_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if current_user.role == UserRole.ADMIN:
+        statement = select(Project.id).join(Admin, Admin.id == Project.admin_id) \
+            .where(Project.id == project_id, Admin.user_id == current_user.id)
+    elif current_user.role == UserRole.CLIENT:
+        statement = select(ProjectClient.project_id).join(Client, Client.id == ProjectClient.client_id) \
+            .where(ProjectClient.project_id == project_id, Client.user_id == current_user.id)
+    else:
+        statement = select(ProjectTeamLink.project_id).join(Worker, Worker.id == ProjectTeamLink.worker_id) \
+            .where(ProjectTeamLink.project_id == project_id, Worker.user_id == current_user.id)
+    if session.exec(statement).first() is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have access to this project")
+    return current_user
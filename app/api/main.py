@@ -8,6 +8,7 @@ from app.api.routes import teams
 from app.api.routes import expenses
 from app.api.routes import notifications
 from app.api.routes import inventory
+from app.api.routes import monitoring
 
 # python -m venv venv
 # .\venv\Scripts\activate
@@ -21,4 +22,5 @@ api_router.include_router(teams.router, prefix="/teams", tags=["teams"])
 api_router.include_router(expenses.router, prefix="/expenses", tags=["expenses"])   
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
 
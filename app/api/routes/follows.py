@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import (APIRouter, HTTPException, Depends, Form)
 from starlette.responses import JSONResponse
 
@@ -11,6 +13,8 @@ from app.core.database import get_session
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 # -------------------------------- GETTERS --------------------------------
 
 
@@ -103,7 +107,7 @@ def follow_user(user_id: int, session: Session = Depends(get_session), current_u
 @router.post("/accept_follow/{user_id}", response_model=Response)
 def accept_follow_request(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
 
-    print(f"Accepting follow request from user {user_id} for current user {current_user.name}")
+    logger.debug("Accepting follow request from user %s for current user %s", user_id, current_user.name)
 
     try:
         follower = follow_crud.accept_follow_request(session=session, follower_id=user_id, following_id=current_user.id)
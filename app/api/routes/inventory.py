@@ -6,17 +6,18 @@ from app.models.response import Response
 from app.models.inventory import InventoryItemCreate, InventoryItemUpdate
 import app.crud.inventory as crud
 from sqlmodel import Session
-from app.core.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session
 
 router = APIRouter()
 
 # -------------------------------- GETTERS --------------------------------
 @router.get("/{project_id}", response_model=Response, dependencies=[Depends(get_current_user)])
 async def get_inventory(project_id: int,
-                         session: Session = Depends(get_session)):
+                         session: AsyncSession = Depends(get_async_session)):
     try:
         """Obtiene el inventario del proyecto"""
-        inventory = crud.get_inventory(session=session, project_id=project_id)
+        inventory = await crud.get_inventory_async(session=session, project_id=project_id)
 
         return Response(statusCode=200, data=inventory, message="Inventory found")
 
@@ -42,7 +43,7 @@ async def get_inventory(project_id: int,
 
 # -------------------------------- POSTERS --------------------------------
 @router.post("/", response_model=Response, dependencies=[Depends(get_current_active_superuser)])
-async def create_inventory_item(
+def create_inventory_item(
         item_data: InventoryItemCreate,
         session: Session = Depends(get_session)
 ):
@@ -81,7 +82,7 @@ async def create_inventory_item(
 
 # -------------------------------- PUTTERS --------------------------------
 @router.put("/{item_id}", response_model=Response, dependencies=[Depends(get_current_active_superuser)])
-async def update_inventory_item(
+def update_inventory_item(
         project_id: int,
         item_id: int,
         item_data: InventoryItemUpdate,
@@ -123,7 +124,7 @@ async def update_inventory_item(
 
 # -------------------------------- DELETERS --------------------------------
 @router.delete("/{item_id}", response_model=Response, dependencies=[Depends(get_current_active_superuser)])
-async def delete_inventory_item(
+def delete_inventory_item(
         project_id: int,
         item_id: int,
         session: Session = Depends(get_session)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_active_superuser
+from app.core.database import get_pool_status
+from app.core.metrics import registry
+from app.models.response import Response
+
+router = APIRouter()
+
+
+@router.get("/pool", response_model=Response, dependencies=[Depends(get_current_active_superuser)])
+def get_pool_stats():
+    """Estado del pool de conexiones: conexiones en uso, overflow y tiempos de espera."""
+    return Response(statusCode=200, data=get_pool_status(), message="Pool status")
+
+
+async def get_metrics():
+    """Métricas de peticiones y base de datos en formato de texto de Prometheus (se registra en /metrics)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
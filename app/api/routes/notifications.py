@@ -1,8 +1,12 @@
+import asyncio
 from typing import List, Optional
-from fastapi import (APIRouter, Depends, HTTPException)
-from fastapi.responses import JSONResponse
+from fastapi import (APIRouter, Depends, HTTPException, Query, Request)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.api.deps import get_current_user, get_current_active_superuser
-from app.models.activity import ActivityOut, ActivityType, ActivityOutList
+from app.core.config import settings
+from app.core.events import broker
+from app.models.activity import ActivityType, EXPENSE_ACTIVITY_TYPES
 from app.models.project import ProjectCreate, ProjectUpdate
 from app.models.response import Response
 from app.models.user import User
@@ -14,40 +18,102 @@ from app.core.database import get_session
 router = APIRouter()
 
 
+# Declarada antes de /{client_id} para que "unread_count" no se tome como id
+@router.get("/unread_count", response_model=Response)
+def get_unread_count(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the number of unread activities of the current user, per project."""
+    try:
+        unread = notification_crud.get_unread_count(session=session, user_id=current_user.id)
+
+        return Response(statusCode=200, data=unread, message="Unread activities counted")
+
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                "statusCode": 500,
+                "data": None,
+                "message": str(e)
+            }
+        )
+
+
+@router.get("/stream")
+async def stream_activities(
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Server-Sent Events with the new activities of the current user's projects."""
+    try:
+        project_ids, is_client = await run_in_threadpool(
+            notification_crud.get_user_feed_projects, session, current_user.id
+        )
+    except HTTPException as http_exc:
+        return JSONResponse(
+            status_code=http_exc.status_code,
+            content={
+                "statusCode": http_exc.status_code,
+                "data": None,
+                "message": http_exc.detail
+            }
+        )
+    finally:
+        # La conexión vuelve al pool: un stream abierto no debe retenerla
+        session.close()
+
+    async def activity_events():
+        async with broker.subscribe(project_ids) as queue:
+            while not await request.is_disconnected():
+                try:
+                    activity = await asyncio.wait_for(
+                        queue.get(), timeout=settings.NOTIFICATIONS_STREAM_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    # Comentario SSE para que proxies y navegador no cierren la conexión
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if is_client and activity.activity_type in EXPENSE_ACTIVITY_TYPES:
+                    continue
+                yield f"id: {activity.id}\nevent: activity\ndata: {activity.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        activity_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{client_id}", response_model=Response, dependencies=[Depends(get_current_user)])
 def get_client_activities(
     client_id: int,
     is_read: Optional[bool] = None,
     activity_type: Optional[ActivityType] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     session: Session = Depends(get_session)
 ):
-    """Get activities for a specific client."""
+    """Get a page of activities for a specific client."""
     try:
-        activities = notification_crud.get_client_activities(
+        page = notification_crud.get_client_activities(
             session=session,
             client_id=client_id,
             is_read=is_read,
-            activity_type=activity_type
+            activity_type=activity_type,
+            cursor=cursor,
+            limit=limit
         )
 
-        if not activities:
+        if not page.activities:
             return Response(statusCode=200, data=None, message="No activities found for this client")
         
         return Response(
             statusCode=200,
-            data= ActivityOutList(
-                activities=[ActivityOut(
-                    id=activity.id,
-                    activity_type=activity.activity_type,
-                    title_project=activity.title_project,
-                    is_read=activity.is_read,
-                    created_at=activity.created_at,
-                    project=activity.project,
-                    task=activity.task,
-                    expense=activity.expense,
-                    inventory_item=activity.inventory_item,
-                    metadatas=activity.metadatas
-                ) for activity in activities]),
+            data=page,
             message="Activities found"
         )
 
@@ -73,24 +139,30 @@ def get_client_activities(
 
 @router.get("/", response_model=Response, dependencies=[Depends(get_current_user)])
 def get_user_activities(
+    is_read: Optional[bool] = None,
+    activity_type: Optional[ActivityType] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get activities for the current user."""
+    """Get a page of activities for the current user."""
     try:
-        activities = notification_crud.get_user_activities(
+        page = notification_crud.get_user_activities(
             session=session,
-            user_id=current_user.id
+            user_id=current_user.id,
+            is_read=is_read,
+            activity_type=activity_type,
+            cursor=cursor,
+            limit=limit
         )
 
-        if not activities:
+        if not page.activities:
             return Response(statusCode=404, data=None, message="No activities found for this user")
 
         return Response(
             statusCode=200,
-            data= {
-                "activities": [ActivityOut.from_activity(activity) for activity in activities]
-            },
+            data=page,
             message="Activities found"
         )
 
@@ -128,7 +200,8 @@ def mark_activity_as_read(
     try:
         updated_activity = notification_crud.mark_activity_as_read(
             session=session,
-            activity_id=activity_id
+            activity_id=activity_id,
+            user_id=current_user.id
         )
 
         if not updated_activity:
@@ -136,7 +209,7 @@ def mark_activity_as_read(
 
         return Response(
             statusCode=200,
-            data=ActivityOut.from_activity(updated_activity),
+            data=updated_activity,
             message="Activity marked as read"
         )
 
@@ -167,28 +240,20 @@ def mark_activity_as_read(
 )
 def mark_all_activities_as_read(
     project_id: int,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
 ):
     """Mark all activities for a project as read."""
     try:
-        updated_activities = notification_crud.mark_all_activities_as_read(
+        marked = notification_crud.mark_all_activities_as_read(
             session=session,
-            project_id=project_id
+            project_id=project_id,
+            user_id=current_user.id
         )
 
-        if not updated_activities:
-            return JSONResponse(
-                status_code=404,
-                content={
-                    "statusCode": 404,
-                    "data": None,
-                    "message": "No activities found for this project"
-                }
-            )
-
         return Response(
             statusCode=200,
-            data=updated_activities,
+            data=marked,
             message="Activities marked as read"
         )
 
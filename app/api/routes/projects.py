@@ -1,23 +1,32 @@
-from fastapi import (APIRouter, Depends, HTTPException)
-from fastapi.responses import JSONResponse
-from app.api.deps import get_current_user, get_current_active_superuser
-from app.models.project import ProjectCreate, ProjectUpdate
+import logging
+from typing import Optional
+
+from fastapi import (APIRouter, Depends, HTTPException, Query, Request)
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.api.deps import get_current_user, get_current_active_superuser, get_project_member
+from app.models.project import ProjectCreate, ProjectUpdate, ProjectView
+from app.core.records import ExportFormat
 from app.models.response import Response
 from app.models.user import User, UserOut
 import app.crud.project as crud
 import app.crud.task as task_crud
+import app.crud.expense as expense_crud
+import app.crud.inventory as inventory_crud
 from sqlmodel import Session
-from app.core.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 # -------------------------------- GETTERS --------------------------------
 @router.get("/{project_id}", response_model=Response, dependencies=[Depends(get_current_user)])
 async def get_project(project_id: int,
-                      session: Session = Depends(get_session)):
+                      session: AsyncSession = Depends(get_async_session)):
     try:
-        project = crud.get_project_details(session=session, project_id=project_id)
+        project = await crud.get_project_details_async(session=session, project_id=project_id)
 
         return Response(statusCode=200, data=project, message="Project found")
 
@@ -43,10 +52,20 @@ async def get_project(project_id: int,
 
 @router.get("/", response_model=Response)
 async def get_projects(current_user: UserOut = Depends(get_current_user),
-                       session: Session = Depends(get_session)):
+                       session: AsyncSession = Depends(get_async_session),
+                       view: ProjectView = ProjectView.FULL,
+                       cursor: Optional[int] = None,
+                       limit: int = Query(20, ge=1, le=100)):
 
     try:
-        projects = crud.get_projects(session=session, user_id=current_user.id)
+        if view == ProjectView.SUMMARY:
+            # Listado ligero paginado por id (cursor = último id recibido)
+            page = await crud.get_projects_summary_page_async(
+                session=session, user_id=current_user.id, cursor=cursor, limit=limit
+            )
+            return Response(statusCode=200, data=page, message="Projects found")
+
+        projects = await crud.get_projects_async(session=session, user_id=current_user.id)
 
         if not projects:
             return Response(statusCode=200, data=None, message="No projects found")
@@ -73,9 +92,61 @@ async def get_projects(current_user: UserOut = Depends(get_current_user),
         )
 
 
+@router.get("/{project_id}/expenses/export", dependencies=[Depends(get_project_member)])
+async def export_project_expenses(project_id: int,
+                                  export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+                                  session: AsyncSession = Depends(get_async_session)):
+    """Descarga los gastos del proyecto en CSV o NDJSON, enviados en streaming"""
+    try:
+        content = await expense_crud.export_project_expenses(
+            session=session, project_id=project_id, export_format=export_format
+        )
+    except HTTPException as http_exc:
+        return JSONResponse(
+            status_code=http_exc.status_code,
+            content={
+                "statusCode": http_exc.status_code,
+                "data": None,
+                "message": http_exc.detail
+            }
+        )
+
+    return StreamingResponse(
+        content,
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-expenses.{export_format.value}"'}
+    )
+
+
+@router.get("/{project_id}/inventory/export", dependencies=[Depends(get_project_member)])
+async def export_project_inventory(project_id: int,
+                                   export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+                                   session: AsyncSession = Depends(get_async_session)):
+    """Descarga el inventario del proyecto en CSV o NDJSON, enviado en streaming"""
+    try:
+        content = await inventory_crud.export_project_inventory(
+            session=session, project_id=project_id, export_format=export_format
+        )
+    except HTTPException as http_exc:
+        return JSONResponse(
+            status_code=http_exc.status_code,
+            content={
+                "statusCode": http_exc.status_code,
+                "data": None,
+                "message": http_exc.detail
+            }
+        )
+
+    return StreamingResponse(
+        content,
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-inventory.{export_format.value}"'}
+    )
+
+
 # --------------------------------- POST ---------------------------------
 @router.post("/create", response_model=Response)
-async def create_project(
+def create_project(
         project: ProjectCreate,
         session: Session = Depends(get_session),
         current_user: User = Depends(get_current_active_superuser)
@@ -85,7 +156,7 @@ async def create_project(
         if project.clients_ids:
             invalid_clients = []
             for client_id in project.clients_ids:
-                print(f"-----------------------------------||||Validating client ID: {client_id}")
+                logger.debug("Validating client ID: %s", client_id)
                 client = session.get(User, client_id)
                 if not client or client.role != "client":  # Asegura que sean clients
                     invalid_clients.append(client_id)
@@ -125,7 +196,7 @@ async def create_project(
 
 @router.post("/add_client/{project_id}", response_model=Response,
             dependencies=[Depends(get_current_active_superuser)])
-async def add_client_to_project(
+def add_client_to_project(
         project_id: int,
         client_id: int,
         session: Session = Depends(get_session)
@@ -158,11 +229,85 @@ async def add_client_to_project(
     return Response(statusCode=200, data=updated_project, message="Client added to project successfully")
 
 
+@router.post("/{project_id}/expenses/import", response_model=Response,
+            dependencies=[Depends(get_current_active_superuser)])
+async def import_project_expenses(
+        project_id: int,
+        request: Request,
+        session: AsyncSession = Depends(get_async_session)
+):
+    """Importa gastos desde un CSV (text/csv) o NDJSON (application/x-ndjson) enviado en el cuerpo"""
+    try:
+        report = await expense_crud.import_project_expenses(
+            session=session,
+            project_id=project_id,
+            chunks=request.stream(),
+            content_type=request.headers.get("content-type")
+        )
+    except HTTPException as http_exc:
+        return JSONResponse(
+            status_code=http_exc.status_code,
+            content={
+                "statusCode": http_exc.status_code,
+                "data": None,
+                "message": http_exc.detail
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                "statusCode": 500,
+                "data": None,
+                "message": str(e)
+            }
+        )
+
+    return Response(statusCode=200, data=report, message="Expenses imported")
+
+
+@router.post("/{project_id}/inventory/import", response_model=Response,
+            dependencies=[Depends(get_current_active_superuser)])
+async def import_project_inventory(
+        project_id: int,
+        request: Request,
+        session: AsyncSession = Depends(get_async_session)
+):
+    """Crea o actualiza (por nombre) items de inventario desde una hoja de proveedor en CSV o NDJSON"""
+    try:
+        report = await inventory_crud.import_project_inventory(
+            session=session,
+            project_id=project_id,
+            chunks=request.stream(),
+            content_type=request.headers.get("content-type")
+        )
+    except HTTPException as http_exc:
+        return JSONResponse(
+            status_code=http_exc.status_code,
+            content={
+                "statusCode": http_exc.status_code,
+                "data": None,
+                "message": http_exc.detail
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                "statusCode": 500,
+                "data": None,
+                "message": str(e)
+            }
+        )
+
+    return Response(statusCode=200, data=report, message="Inventory imported")
+
+
 # --------------------------------- PUT ---------------------------------
 
 @router.put("/{project_id}", response_model=Response,
             dependencies=[Depends(get_current_active_superuser)])
-async def update_project(
+def update_project(
         project_id: int,
         project: ProjectUpdate,
         session: Session = Depends(get_session)
@@ -198,7 +343,7 @@ async def update_project(
 # --------------------------------- DELETE --------------------------------
 @router.delete("/{project_id}", response_model=Response,
                dependencies=[Depends(get_current_active_superuser)])
-async def delete_project(
+def delete_project(
         project_id: int,
         session: Session = Depends(get_session)
 ):
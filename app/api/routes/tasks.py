@@ -55,7 +55,7 @@ def create_task_for_project(
 
 @router.delete("/{project_id}/{task_id}",
                dependencies=[Depends(get_current_active_superuser)])
-async def remove_task(
+def remove_task(
         project_id: int,
         task_id: int,
         session: Session = Depends(get_session),
@@ -95,7 +95,7 @@ async def remove_task(
 
 @router.put("/{project_id}/{task_id}", response_model=Response,
                 dependencies=[Depends(get_admin_or_worker_permissions)])
-async def update_task(
+def update_task(
         project_id: int,
         task_id: int,
         task_data: TaskUpdate,
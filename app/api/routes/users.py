@@ -9,22 +9,23 @@ from app.models.user import User, UserRegister, UserUpdate, UserOut, UsersOut, U
 import app.crud.user as crud
 import app.crud.follow as follow_crud
 from sqlmodel import Session
-from app.core.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session
 from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from datetime import timedelta
-from app.core.security import authenticate_user, authenticate_user_with_email
+from app.core.security import authenticate_user_async, authenticate_user_with_email_async
 
 router = APIRouter()
 
 # -------------------------------- GETTERS --------------------------------
 @router.get("/me", response_model=Response)
 async def read_users_me(current_user: UserOut = Depends(get_current_user),
-                        session: Session = Depends(get_session)):
+                        session: AsyncSession = Depends(get_async_session)):
     try:
 
-        current_user = enrich_user_with_follow_data(session=session, user=current_user)
+        current_user = await session.run_sync(enrich_user_with_follow_data, current_user)
 
-        current_user = enrich_user_with_role_data(session=session, current_user=current_user)
+        current_user = await session.run_sync(enrich_user_with_role_data, current_user)
 
     except HTTPException as e:
         return JSONResponse(
@@ -99,28 +100,28 @@ def get_all_users(session: Session = Depends(get_session), current_user: User =
 
 
 @router.get("/{user_id}", response_model=Response)
-async def read_user(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    user = crud.get_user(session=session, user_id=user_id)
+async def read_user(user_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    user = await crud.get_user_async(session=session, user_id=user_id)
     if user is None:
         return Response(statusCode=404, data=None, message="User not found")
     return Response(statusCode=200, data=user, message="User found")
 
 
 @router.get("/userInDB/{user_id}", response_model=Response)
-async def read_user_in_db(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_active_superuser)):
-    user = crud.get_user_in_db(session=session, user_id=user_id)
+async def read_user_in_db(user_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_active_superuser)):
+    user = await crud.get_user_in_db_async(session=session, user_id=user_id)
     if user is None:
         return Response(statusCode=404, data=None, message="User not found")
     return Response(statusCode=200, data=user, message="User found")
 
 
 @router.get("/get_user_client/{user_id}", response_model=Response)
-async def get_user_client(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    client = crud.get_user_client(session=session, user_id=user_id)
+async def get_user_client(user_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    client = await crud.get_user_client_async(session=session, user_id=user_id)
     if client is None:
         return Response(statusCode=404, data=None, message="User not found")
 
-    client = enrich_user_with_follow_data(session=session, user=client)
+    client = await session.run_sync(enrich_user_with_follow_data, client)
 
     return Response(statusCode=200, data={"user": client}, message="User found")
 
@@ -144,7 +145,7 @@ def enrich_user_with_role_data(session: Session, current_user:UserOut):
     return current_user
 
 @router.post("/", response_model=Response)
-async def create_user(new_user: UserRegister, session: Session = Depends(get_session)):
+def create_user(new_user: UserRegister, session: Session = Depends(get_session)):
     try:
         new_user = crud.create_user(session=session, user_data=new_user)
     except HTTPException as e:
@@ -156,9 +157,10 @@ async def create_user(new_user: UserRegister, session: Session = Depends(get_ses
 
 
 @router.post("/token")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(),
+                                 session: AsyncSession = Depends(get_async_session)):
     try:
-        user = authenticate_user(session=session, username=form_data.username, password=form_data.password)
+        user = await authenticate_user_async(session=session, username=form_data.username, password=form_data.password)
     except HTTPException as e:
         return Response(statusCode=e.status_code, data=None, message=e.detail)
 
@@ -171,16 +173,16 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 @router.post("/token_username", response_model=Response)
 async def login_for_access_token(credentials: LoginForm,
-                                 session: Session = Depends(get_session)):
+                                 session: AsyncSession = Depends(get_async_session)):
     try:
-        user = authenticate_user(session=session, username=credentials.username, password=credentials.password)
+        user = await authenticate_user_async(session=session, username=credentials.username, password=credentials.password)
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
 
         # Si el User está autenticado, buscamos si tiene un perfil de Admin, Worker o Client
-        user_role = enrich_user_with_role_data( session=session, current_user=user)
-        user_role = enrich_user_with_follow_data(session=session, user=user_role)
+        user_role = await session.run_sync(enrich_user_with_role_data, user)
+        user_role = await session.run_sync(enrich_user_with_follow_data, user_role)
 
     except HTTPException as e:
         return JSONResponse(
@@ -210,9 +212,9 @@ async def login_for_access_token(credentials: LoginForm,
 
 @router.post("/token_email")
 async def login_for_access_token(credentials: LoginForm,
-                                 session: Session = Depends(get_session)):
+                                 session: AsyncSession = Depends(get_async_session)):
     try:
-        user = authenticate_user_with_email(session=session, email=credentials.email, password=credentials.password)
+        user = await authenticate_user_with_email_async(session=session, email=credentials.email, password=credentials.password)
     except HTTPException as e:
         return Response(statusCode=e.status_code, data=None, message=e.detail)
 
@@ -220,9 +222,9 @@ async def login_for_access_token(credentials: LoginForm,
     access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
 
     try:
-        user_role = enrich_user_with_role_data(session=session, current_user=user)
+        user_role = await session.run_sync(enrich_user_with_role_data, user)
 
-        user_role = enrich_user_with_follow_data(session=session, user=user_role)
+        user_role = await session.run_sync(enrich_user_with_follow_data, user_role)
     except HTTPException as e:
         return JSONResponse(
             status_code=e.status_code,
@@ -251,7 +253,7 @@ async def login_for_access_token(credentials: LoginForm,
 
 # ----------------------------- PUTS --------------------------------
 @router.put("/{user_id}", response_model=Response)
-async def update_user(user_id: int, user: UserUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def update_user(user_id: int, user: UserUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
 
     try:
         result = crud.update_user(session=session, user_id=user_id, user=user)
@@ -280,7 +282,7 @@ async def update_user(user_id: int, user: UserUpdate, session: Session = Depends
 
 # ----------------------------- DELETES --------------------------------
 @router.delete("/{user_id}", response_model=Response)
-async def delete_user(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def delete_user(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     result = crud.delete_user(session=session, user_id=user_id)
     if result is None:
         return Response(statusCode=404, data=None, message="User not found")
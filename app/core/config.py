@@ -3,6 +3,14 @@ import secrets
 from pydantic import MySQLDsn, computed_field, Field
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Literal
+
+# Driver asíncrono equivalente a cada driver síncrono soportado
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
 
 class Settings(BaseSettings):
     """
@@ -25,6 +33,30 @@ class Settings(BaseSettings):
     DB_PASSWORD: str | None = Field(default=None, env="DB_PASSWORD")
     DB_NAME: str = Field(default="sottobudget", env="DB_NAME")
 
+    # Pool de conexiones del engine (por proceso de uvicorn)
+    DB_POOL_SIZE: int = Field(default=10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(default=30, env="DB_POOL_TIMEOUT")  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")  # por debajo del wait_timeout de MySQL
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_ECHO: bool = Field(default=False, env="DB_ECHO")  # Log de cada sentencia SQL, solo para depurar
+
+    # Detector de N+1 por petición: un SELECT repetido este número de veces con distintos
+    # parámetros se loguea con su origen (0 lo desactiva); en los tests puede lanzar una excepción
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(default=10, env="SQL_N_PLUS_ONE_THRESHOLD")
+    SQL_N_PLUS_ONE_RAISE: bool = Field(default=False, env="SQL_N_PLUS_ONE_RAISE")
+
+    # Métricas de Prometheus en /metrics (middleware de app/core/metrics.py)
+    METRICS_ENABLED: bool = Field(default=True, env="METRICS_ENABLED")
+
+    # Logging (ver app/core/logs.py): nivel global, formato, fichero opcional
+    # y niveles por logger, p. ej. LOG_LEVELS='{"app.crud": "DEBUG"}'
+    LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
+    LOG_FORMAT: Literal["json", "text"] = Field(default="json", env="LOG_FORMAT")
+    LOG_TO_FILE: bool = Field(default=True, env="LOG_TO_FILE")
+    LOG_FILE: str = Field(default="app.log", env="LOG_FILE")
+    LOG_LEVELS: Dict[str, str] = Field(default={}, env="LOG_LEVELS")
+
     # 🔹 Configuración para Railway (Producción)
     DATABASE_URL: str | None = Field(default=None, env="DATABASE_URL")
 
@@ -32,6 +64,30 @@ class Settings(BaseSettings):
     TOKEN_EXPIRE_TIME: int = 60 * 24 * 2  # 2 días
     SECRET_KEY: str = Field(default=os.getenv("SECRET_KEY", secrets.token_urlsafe(32)), env="SECRET_KEY")
 
+    # Caché de usuarios autenticados (token -> usuario); 0 la desactiva
+    AUTH_CACHE_TTL: int = Field(default=60, env="AUTH_CACHE_TTL")  # segundos
+    AUTH_CACHE_MAX_SIZE: int = Field(default=1024, env="AUTH_CACHE_MAX_SIZE")
+
+    # Hilos dedicados a bcrypt (hash y verificación de contraseñas) por proceso
+    PASSWORD_HASH_WORKERS: int = Field(default=4, env="PASSWORD_HASH_WORKERS")
+
+    # Stream SSE de notificaciones (/notifications/stream)
+    NOTIFICATIONS_STREAM_KEEPALIVE: int = Field(default=15, env="NOTIFICATIONS_STREAM_KEEPALIVE")  # segundos
+    NOTIFICATIONS_STREAM_QUEUE_SIZE: int = Field(default=100, env="NOTIFICATIONS_STREAM_QUEUE_SIZE")  # eventos por conexión
+
+    # Outbox de actividades: con ACTIVITY_OUTBOX_ASYNC los contadores de no leídas y el stream
+    # se actualizan en segundo plano en lugar de en la transacción de cada escritura
+    ACTIVITY_OUTBOX_ASYNC: bool = Field(default=False, env="ACTIVITY_OUTBOX_ASYNC")
+    ACTIVITY_OUTBOX_INTERVAL: float = Field(default=1.0, env="ACTIVITY_OUTBOX_INTERVAL")  # segundos
+    ACTIVITY_OUTBOX_BATCH_SIZE: int = Field(default=500, env="ACTIVITY_OUTBOX_BATCH_SIZE")
+
+    # Importaciones masivas (CSV/NDJSON): filas por INSERT en lote y errores detallados en la respuesta
+    BULK_IMPORT_BATCH_SIZE: int = Field(default=1000, env="BULK_IMPORT_BATCH_SIZE")
+    BULK_IMPORT_MAX_ERRORS: int = Field(default=1000, env="BULK_IMPORT_MAX_ERRORS")
+
+    # Exportaciones en streaming: filas leídas del cursor de servidor en cada bloque
+    EXPORT_YIELD_PER: int = Field(default=1000, env="EXPORT_YIELD_PER")
+
     @computed_field  # type: ignore[misc]
     @property
     def SQLALCHEMY_URI(self) -> str | None | MultiHostUrl:
@@ -53,6 +109,17 @@ class Settings(BaseSettings):
 
         return database_uri
 
+    @computed_field  # type: ignore[misc]
+    @property
+    def SQLALCHEMY_ASYNC_URI(self) -> str:
+        """
+        Misma base de datos que SQLALCHEMY_URI pero con driver asíncrono
+        (aiomysql para MySQL, aiosqlite para SQLite en local).
+        """
+        scheme, _, rest = str(self.SQLALCHEMY_URI).partition("://")
+        dialect = scheme.split("+")[0]
+        return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
 
 # Instancia global de configuración
 settings = Settings()
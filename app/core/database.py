@@ -1,14 +1,145 @@
+import logging
+import threading
+import time
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Acumula cuánto esperan las peticiones para obtener una conexión del pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, pool) -> dict:
+        """Estado actual del pool junto a las estadísticas de espera acumuladas."""
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total * 1000 / waits, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide el tiempo de espera de cada checkout."""
+    stats = pool_stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            logger.warning("Database pool exhausted: %s", self.status())
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Versión para el engine asíncrono."""
+    stats = async_pool_stats
+
+
+def engine_options(uri: str, is_async: bool = False) -> dict:
+    """Opciones de create_engine según Settings (SQLite no admite un pool con tamaño)."""
+    # DB_ECHO no usa echo=True (escribe en stdout de forma síncrona): lo aplica setup_logging
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not uri.startswith("sqlite"):
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
 # 🛠 Creamos el engine con la configuración correcta (local o Railway)
-engine = create_engine(str(settings.SQLALCHEMY_URI), echo=True)
+engine = create_engine(str(settings.SQLALCHEMY_URI), **engine_options(str(settings.SQLALCHEMY_URI)))
+
+# Engine asíncrono sobre la misma base de datos, para las rutas `async def`
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_URI, **engine_options(settings.SQLALCHEMY_ASYNC_URI, is_async=True)
+)
 
 def get_session():
     """Generador de sesiones para SQLModel."""
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    """Generador de sesiones asíncronas; no bloquea el event loop mientras espera a MySQL."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+def insert_or_increment(session: Session, model: type[SQLModel], rows: list[dict], column: str):
+    """
+    INSERT de `rows` que, si la clave primaria ya existe, suma su valor de `column` al de la
+    fila existente. Es una sola sentencia atómica (ON DUPLICATE KEY UPDATE en MySQL,
+    ON CONFLICT DO UPDATE en SQLite y PostgreSQL), segura con inserciones concurrentes.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(table).values(rows)
+        statement = statement.on_duplicate_key_update({column: table.c[column] + statement.inserted[column]})
+    elif dialect in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={column: table.c[column] + statement.excluded[column]}
+        )
+    else:
+        raise NotImplementedError(f"insert_or_increment does not support {dialect}")
+    session.exec(statement)
+
+def get_pool_status() -> dict:
+    """Estadísticas de los pools de los engines síncrono y asíncrono."""
+    return {
+        "sync": pool_stats.snapshot(engine.pool),
+        "async": async_pool_stats.snapshot(async_engine.pool),
+    }
+
 # 🔹 Crear automáticamente las tablas al iniciar la aplicación
 def init_db():
     SQLModel.metadata.create_all(engine)
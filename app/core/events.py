@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+PENDING_EVENTS_KEY = "pending_events"
+
+
+class Subscriber:
+    """Cola de eventos de una conexión abierta, ligada al event loop que la consume."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+
+    def _put(self, item: Any):
+        # Un cliente lento pierde los eventos más antiguos en lugar de bloquear al resto
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    def deliver(self, item: Any):
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # El loop ya se ha cerrado: la conexión desaparecerá al cancelar su suscripción
+            pass
+
+
+class EventBroker:
+    """
+    Pub/sub en memoria por proyecto. Es local a cada proceso: con varios workers,
+    cada uno solo notifica las escrituras que él mismo ha confirmado.
+    """
+
+    def __init__(self, max_queue_size: int):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, project_ids: Iterable[int]) -> AsyncIterator[asyncio.Queue]:
+        subscriber = Subscriber(asyncio.get_running_loop(), self.max_queue_size)
+        project_ids = set(project_ids)
+        with self._lock:
+            for project_id in project_ids:
+                self._subscribers.setdefault(project_id, set()).add(subscriber)
+        try:
+            yield subscriber.queue
+        finally:
+            with self._lock:
+                for project_id in project_ids:
+                    subscribers = self._subscribers.get(project_id)
+                    if subscribers is not None:
+                        subscribers.discard(subscriber)
+                        if not subscribers:
+                            del self._subscribers[project_id]
+
+    def publish(self, project_id: int, item: Any):
+        """Entrega `item` a los suscriptores del proyecto. Se puede llamar desde cualquier hilo."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscriber in subscribers:
+            subscriber.deliver(item)
+
+
+broker = EventBroker(max_queue_size=settings.NOTIFICATIONS_STREAM_QUEUE_SIZE)
+
+
+def publish_on_commit(session: Session, project_id: int, item: Any):
+    """Publica `item` cuando se confirme la transacción de `session`; se descarta si se deshace."""
+    session.info.setdefault(PENDING_EVENTS_KEY, []).append((project_id, item))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session):
+    for project_id, item in session.info.pop(PENDING_EVENTS_KEY, []):
+        broker.publish(project_id, item)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
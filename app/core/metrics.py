@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.queries import track_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+Labels = Tuple[str, ...]
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{format_labels(self.label_names, labels)} {value}" for labels, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Labels, amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets
+        # Por serie: observaciones por bucket (no acumuladas, la última es +Inf), suma y total
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, observations in zip((*self.buckets, "+Inf"), counts):
+                cumulative += observations
+                bucket_labels = format_labels((*self.label_names, "le"), (*labels, bound))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            rendered = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{rendered} {total}")
+            lines.append(f"{self.name}_count{rendered} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+ROUTE_LABELS = ("method", "route")
+requests_total = registry.register(Counter(
+    "http_requests_total", "Peticiones HTTP atendidas.", ("method", "route", "status")))
+requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso.", ROUTE_LABELS))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP.", ROUTE_LABELS, LATENCY_BUCKETS))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Tamaño del cuerpo de las respuestas HTTP.", ROUTE_LABELS, SIZE_BUCKETS))
+request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "Sentencias SQL ejecutadas por petición.", ROUTE_LABELS, QUERY_BUCKETS))
+request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Tiempo en base de datos por petición.", ROUTE_LABELS, LATENCY_BUCKETS))
+
+
+def route_template(app: ASGIApp, scope: Scope) -> str:
+    """Plantilla de la ruta (/projects/{project_id}); las rutas inexistentes se agrupan para acotar las series."""
+    partial = None
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # Misma ruta con otro método (p. ej. el preflight OPTIONS de CORS)
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP: número, latencia hasta el último byte,
+    peticiones en curso, tamaño de la respuesta y sentencias/tiempo de base de datos.
+    """
+
+    def __init__(self, app: ASGIApp, router: ASGIApp):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], route_template(self.router, scope))
+        status = "500"
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_progress.inc(labels)
+        start = time.perf_counter()
+        stats = None
+        try:
+            # Cuenta las sentencias de la petición y avisa de los N+1 (ver app/core/queries.py)
+            with track_queries(context=" ".join(labels)) as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            request_duration.observe(labels, time.perf_counter() - start)
+            requests_in_progress.dec(labels)
+            requests_total.inc((*labels, status))
+            response_size.observe(labels, size)
+            # Sin estadísticas si track_queries falla antes de abrir el bloque: no se oculta su error
+            if stats is not None:
+                request_db_queries.observe(labels, stats.count)
+                request_db_duration.observe(labels, stats.duration)
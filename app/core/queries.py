@@ -0,0 +1,134 @@
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_DIR = os.path.join(APP_DIR, "core")
+# Donde se busca la función que origina la consulta: primero CRUD y, si no hay, la ruta
+CALLER_DIRS = (os.path.join(APP_DIR, "crud"), os.path.join(APP_DIR, "api"))
+
+
+class NPlusOneQueryError(AssertionError):
+    """Se ha repetido la misma consulta con distintos parámetros (con SQL_N_PLUS_ONE_RAISE)."""
+
+
+def query_origin() -> str:
+    """
+    Código de la aplicación que ha lanzado la consulta: la función más interna fuera de app/core
+    y, si es otra, la función de app/crud (o en su defecto de app/api) más cercana que la llama.
+    """
+    frame = sys._getframe(1)
+    innermost = None
+    callers = {}
+    while frame is not None and CALLER_DIRS[0] not in callers:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(CORE_DIR):
+            location = f"{frame.f_code.co_name} ({os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno})"
+            innermost = innermost or location
+            for directory in CALLER_DIRS:
+                if filename.startswith(directory):
+                    callers.setdefault(directory, location)
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    caller = next((callers[directory] for directory in CALLER_DIRS if directory in callers), None)
+    return innermost if caller in (None, innermost) else f"{innermost} <- {caller}"
+
+
+class QueryStats:
+    """
+    Sentencias SQL y tiempo en base de datos de una petición (o de un bloque track_queries).
+    Un SELECT que se ejecuta con `n_plus_one_threshold` conjuntos de parámetros distintos se anota
+    como N+1 (repetir la misma consulta con los mismos parámetros no lo es) junto al código que lo origina. Las sentencias cuentan también en el bloque
+    que lo contiene (`parent`), p. ej. un test alrededor de la petición que mide el middleware.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 0, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements: Dict[str, int] = {}  # sentencia -> ejecuciones
+        self.parameters: Dict[str, Set[str]] = {}  # sentencia -> conjuntos de parámetros distintos
+        self.n_plus_one: Dict[str, str] = {}  # sentencia -> origen
+
+    def record(self, statement: str, duration: float, parameters: Any = None):
+        self.count += 1
+        self.duration += duration
+        if not self.n_plus_one_threshold or not statement.lstrip()[:6].upper() == "SELECT":
+            return
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if statement in self.n_plus_one:
+            return  # Ya detectado: no hace falta seguir guardando parámetros
+        distinct = self.parameters.setdefault(statement, set())
+        # repr: los parámetros del driver pueden ser tuplas, dicts o listas (executemany)
+        distinct.add(repr(parameters))
+        if len(distinct) == self.n_plus_one_threshold:
+            self.n_plus_one[statement] = query_origin()
+
+    def report(self, context: str) -> List[str]:
+        """Mensajes de los N+1 detectados; se loguean como warning."""
+        messages = [
+            f"N+1 query in {context}: {self.statements[statement]} executions from {origin}: "
+            f"{' '.join(statement.split())[:300]}"
+            for statement, origin in self.n_plus_one.items()
+        ]
+        for message in messages:
+            logger.warning(message)
+        return messages
+
+
+# El objeto se comparte con las copias del contexto (threadpool, greenlets de AsyncSession)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        duration = time.perf_counter() - starts.pop()
+        while stats is not None:
+            stats.record(statement, duration, parameters)
+            stats = stats.parent
+
+
+@contextmanager
+def track_queries(
+        context: str = "block",
+        n_plus_one_threshold: Optional[int] = None,
+        raise_on_n_plus_one: Optional[bool] = None
+) -> Iterator[QueryStats]:
+    """
+    Cuenta las sentencias ejecutadas dentro del bloque. Al salir loguea los N+1 detectados
+    y, con `raise_on_n_plus_one` (por defecto SQL_N_PLUS_ONE_RAISE), lanza NPlusOneQueryError.
+    """
+    stats = QueryStats(
+        settings.SQL_N_PLUS_ONE_THRESHOLD if n_plus_one_threshold is None else n_plus_one_threshold,
+        parent=current_query_stats.get()
+    )
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+    messages = stats.report(context)
+    if messages and (settings.SQL_N_PLUS_ONE_RAISE if raise_on_n_plus_one is None else raise_on_n_plus_one):
+        raise NPlusOneQueryError("\n".join(messages))
@@ -0,0 +1,168 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette import status
+
+from app.core.config import settings
+
+CSV_MEDIA_TYPES = {"text/csv", "application/csv"}
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+    @property
+    def media_type(self) -> str:
+        return "text/csv; charset=utf-8" if self is ExportFormat.CSV else "application/x-ndjson"
+
+
+class RecordError(ValueError):
+    """Fila que no se ha podido leer (JSON inválido, columnas de más o de menos...)."""
+
+
+Record = Tuple[int, Union[Dict[str, Any], RecordError]]
+
+
+def record_format(content_type: Optional[str]) -> str:
+    """Formato ("csv" o "ndjson") según el Content-Type de la petición."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        return "csv"
+    if media_type in NDJSON_MEDIA_TYPES:
+        return "ndjson"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Content-Type must be text/csv or application/x-ndjson"
+    )
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decodifica el cuerpo en UTF-8 a medida que llega y lo corta en líneas (con su salto)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_csv_records(lines: AsyncIterable[str]) -> AsyncIterator[Record]:
+    """Filas de un CSV con cabecera; las celdas vacías se omiten para que apliquen los valores por defecto."""
+    header = None
+    pending = ""
+    row = 0
+    async for line in lines:
+        pending += line
+        # Un campo entre comillas puede contener saltos de línea: el registro sigue abierto
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, RecordError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row, {name: value for name, value in zip(header, values) if value != ""}
+    if pending.strip():
+        yield row + 1, RecordError("Unterminated quoted field")
+
+
+async def iter_ndjson_records(lines: AsyncIterable[str]) -> AsyncIterator[Record]:
+    """Un objeto JSON por línea; las líneas en blanco se ignoran."""
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, RecordError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(value, dict):
+            yield row, RecordError("Expected a JSON object")
+            continue
+        yield row, value
+
+
+async def iter_record_batches(
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str],
+        batch_size: int
+) -> AsyncIterator[List[Record]]:
+    """
+    Lee un CSV o NDJSON en streaming y lo entrega en lotes de `batch_size` filas,
+    sin cargar el cuerpo completo en memoria.
+    """
+    parse = iter_csv_records if record_format(content_type) == "csv" else iter_ndjson_records
+    batch: List[Record] = []
+    async for record in parse(iter_lines(chunks)):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def format_records(fields: List[str], rows: Iterable[Sequence], export_format: ExportFormat, header: bool) -> str:
+    """Serializa un bloque de filas en CSV (con cabecera opcional) o NDJSON."""
+    if export_format is ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(fields)
+        writer.writerows([export_value(value) for value in row] for row in rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(fields, (export_value(value) for value in row)))) + "\n" for row in rows
+    )
+
+
+async def stream_records(
+        engine: AsyncEngine,
+        statement: Select,
+        fields: List[str],
+        export_format: ExportFormat
+) -> AsyncIterator[str]:
+    """
+    Ejecuta `statement` con un cursor de servidor y serializa las filas por bloques de EXPORT_YIELD_PER,
+    de modo que la memoria no depende del número de filas. Abre su propia sesión sobre `engine` (el de
+    la sesión de la petición): esa sesión ya se ha cerrado cuando StreamingResponse envía el cuerpo.
+    """
+    async with AsyncSession(engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+        header = True
+        async for rows in result.partitions():
+            yield format_records(fields, rows, export_format, header)
+            header = False
+        if header:
+            yield format_records(fields, [], export_format, header)
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 from typing import Optional
@@ -5,12 +7,19 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.user import User, UserOut
 from sqlalchemy import or_
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt libera el GIL: un pool de hilos acotado permite hashear en paralelo sin
+# bloquear el event loop y limita cuántos hashes se calculan a la vez
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
 # Secret key and algorithm for JWT
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
@@ -18,11 +27,21 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 40
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_executor.submit(pwd_context.hash, password).result()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
 
 
 def get_user_by_email(*, session: Session, email: str) -> User | None:
@@ -51,6 +70,23 @@ def authenticate_user(session: Session, username: str, password: str) -> UserOut
     return UserOut.model_validate(user)
 
 
+async def authenticate_user_with_email_async(session: AsyncSession, email: str, password: str) -> UserOut:
+    """Variante asíncrona de authenticate_user_with_email."""
+    statement = select(User).where(or_(User.email == email, User.username == email))
+    user = (await session.exec(statement)).first()
+    if not user or not await verify_password_async(password, user.password):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return UserOut.model_validate(user)
+
+
+async def authenticate_user_async(session: AsyncSession, username: str, password: str) -> UserOut:
+    """Variante asíncrona de authenticate_user."""
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user or not await verify_password_async(password, user.password):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return UserOut.model_validate(user)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -1,13 +1,20 @@
-from typing import Dict
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import func
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, update
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
 from starlette import status
 
-from app.crud.notification import notify_expense_deletion, notify_expense_update, send_expense_notifications
+from app.core.config import settings
+from app.core.records import ExportFormat, Record, RecordError, iter_record_batches, record_format, stream_records
+from app.crud.notification import notify_expense_deletion, notify_expense_update, send_expense_notifications, \
+    send_expense_import_notification
+from app.models.bulk import ImportReport
+from app.models.activity import Activity
 from app.models.expense import ExpenseCreate, Expense, ExpenseUpdate, ExpenseOut, ExpenseBackend
 from app.models.project import Project
 from app.models.project_expense import ProjectExpenseLink
@@ -30,7 +37,7 @@ def create_project_expense(
             project_id=project_id
         )
         session.add(expense)
-        session.commit() # Guardar los cambios en la base de datos
+        session.flush() # Obtener el id del gasto sin cerrar la transacción
 
         # Crear la relación
         link = ProjectExpenseLink(
@@ -40,23 +47,171 @@ def create_project_expense(
             notes=expense_data.notes
         )
         session.add(link)
-        session.commit() # Guardar los cambios en la base de datos
-        session.refresh(expense) # Refrescar el objeto para obtener los datos actualizados
-        session.refresh(link) # Refrescar el objeto
 
         if link:
             send_expense_notifications(
                 session=session,
                 project_id=project_id,
+                title_project=project.title,
                 expense=expense,
             )
 
+        # Gasto, relación y actividad en una sola transacción
+        session.commit()
+        session.refresh(expense) # Refrescar el objeto para obtener los datos actualizados
+        session.refresh(link) # Refrescar el objeto
+
     except Exception as e:
         session.rollback() # Revierte los cambios en caso de error
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error creating expense, {e}")
     
     return expense_to_out(expense=expense, link=link)
 
+def import_expense_batch(
+        session: Session,
+        project_id: int,
+        records: List[Record],
+        report: ImportReport
+) -> float:
+    """
+    Valida un lote de filas importadas e inserta los gastos válidos con sus links, sin hacer commit.
+    Las filas inválidas se anotan en `report`. Devuelve el importe total insertado.
+    """
+    expenses_data = []
+    for row, record in records:
+        if isinstance(record, RecordError):
+            report.add_error(row, record)
+            continue
+        # ExpenseCreate no aplica el alias "date" al validar un dict: se acepta igualmente como columna
+        if "date" in record and "expense_date" not in record:
+            record["expense_date"] = record.pop("date")
+        try:
+            expenses_data.append(ExpenseCreate.model_validate(record))
+        except ValidationError as e:
+            report.add_error(row, e)
+    if not expenses_data:
+        return 0.0
+
+    # Marca del lote: MySQL guarda DATETIME sin microsegundos, así que se trunca para poder compararla
+    now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    session.execute(insert(Expense), [
+        {
+            **expense_data.model_dump(exclude={"approved_by", "notes"}),
+            "project_id": project_id,
+            "created_at": now,
+            "updated_at": now
+        } for expense_data in expenses_data
+    ])
+
+    # Ids del lote en orden de inserción: los gastos del proyecto con esa marca que aún no tienen link
+    # (los lotes anteriores del mismo segundo ya lo tienen)
+    expense_ids = session.exec(
+        select(Expense.id)
+        .outerjoin(ProjectExpenseLink, ProjectExpenseLink.expense_id == Expense.id)
+        .where(Expense.project_id == project_id, Expense.created_at == now, ProjectExpenseLink.expense_id.is_(None))
+        .order_by(Expense.id)
+    ).all()
+    if len(expense_ids) != len(expenses_data):
+        raise RuntimeError(f"Expected {len(expenses_data)} new expenses in the batch, found {len(expense_ids)}")
+
+    session.execute(insert(ProjectExpenseLink), [
+        {
+            "project_id": project_id,
+            "expense_id": expense_id,
+            "approved_by": expense_data.approved_by,
+            "notes": expense_data.notes,
+            "updated_at": now
+        } for expense_id, expense_data in zip(expense_ids, expenses_data)
+    ])
+
+    report.imported += len(expense_ids)
+    return sum(expense_data.amount for expense_data in expenses_data)
+
+
+def finish_expense_import(session: Session, project: Project, report: ImportReport, amount: float):
+    if report.imported:
+        send_expense_import_notification(
+            session=session,
+            project_id=project.id,
+            title_project=project.title,
+            imported=report.imported,
+            amount=amount
+        )
+    session.commit()
+
+
+async def import_project_expenses(
+        session: AsyncSession,
+        project_id: int,
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str]
+) -> ImportReport:
+    """
+    CRUD: Importa gastos desde un CSV o NDJSON recibido en streaming.
+    Las filas se validan e insertan por lotes de BULK_IMPORT_BATCH_SIZE en una sola transacción
+    (cada lote con run_sync sobre la sesión de la petición); las filas inválidas no se insertan
+    y se devuelven en el informe.
+    """
+    record_format(content_type)  # Rechaza el formato antes de leer el cuerpo
+
+    project = await session.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    report = ImportReport()
+    amount = 0.0
+    try:
+        async for records in iter_record_batches(chunks, content_type, settings.BULK_IMPORT_BATCH_SIZE):
+            amount += await session.run_sync(import_expense_batch, project_id, records, report)
+        await session.run_sync(finish_expense_import, project, report, amount)
+    except HTTPException:
+        await session.rollback()
+        raise
+    except UnicodeDecodeError:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error importing expenses, {e}")
+
+    return report
+
+# Columnas del export; "date" como en el import para que el fichero se pueda reimportar
+EXPENSE_EXPORT_COLUMNS = {
+    "id": Expense.id,
+    "date": Expense.expense_date,
+    "title": Expense.title,
+    "category": Expense.category,
+    "description": Expense.description,
+    "amount": Expense.amount,
+    "status": Expense.status,
+    "approved_by": ProjectExpenseLink.approved_by,
+    "notes": ProjectExpenseLink.notes,
+    "created_at": Expense.created_at,
+    "updated_at": Expense.updated_at,
+}
+
+
+async def export_project_expenses(
+        session: AsyncSession,
+        project_id: int,
+        export_format: ExportFormat
+) -> AsyncIterator[str]:
+    """CRUD: Gastos del proyecto en CSV o NDJSON, leídos en streaming por orden de id."""
+    if not await session.get(Project, project_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    statement = (
+        select(*EXPENSE_EXPORT_COLUMNS.values())
+        .outerjoin(ProjectExpenseLink, and_(
+            ProjectExpenseLink.expense_id == Expense.id,
+            ProjectExpenseLink.project_id == project_id
+        ))
+        .where(Expense.project_id == project_id)
+        .order_by(Expense.id)
+    )
+    return stream_records(session.bind, statement, list(EXPENSE_EXPORT_COLUMNS), export_format)
+
 def expense_to_out(expense: Expense, link: ProjectExpenseLink) -> ExpenseOut:
     """
     Combines Expense and ProjectExpenseLink data into an ExpenseOut schema.
@@ -79,6 +234,36 @@ def expense_to_out(expense: Expense, link: ProjectExpenseLink) -> ExpenseOut:
     }
     return ExpenseOut(**expense_dict)
 
+def get_expense_links(session: Session, project_ids: list[int]) -> Dict[tuple, ProjectExpenseLink]:
+    """Carga en una sola consulta los links de gastos de varios proyectos, indexados por (project_id, expense_id)."""
+    if not project_ids:
+        return {}
+    links = session.exec(
+        select(ProjectExpenseLink).where(ProjectExpenseLink.project_id.in_(project_ids))
+    ).all()
+    return {(link.project_id, link.expense_id): link for link in links}
+
+
+def get_expense_with_link(
+        session: Session,
+        project_id: int,
+        expense_id: int
+) -> tuple[Expense | None, ProjectExpenseLink | None]:
+    """Obtiene un gasto del proyecto junto a su link en una sola consulta (LEFT JOIN)."""
+    row = session.exec(
+        select(Expense, ProjectExpenseLink)
+        .outerjoin(ProjectExpenseLink, and_(
+            ProjectExpenseLink.expense_id == Expense.id,
+            ProjectExpenseLink.project_id == project_id
+        ))
+        .where(Expense.id == expense_id)
+        .where(Expense.project_id == project_id)
+    ).first()
+    if not row:
+        return None, None
+    return row
+
+
 def get_project_expense(
         session: Session,
         project_id: int,
@@ -89,22 +274,13 @@ def get_project_expense(
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    # Verificar que el gasto existe en el proyecto
-    expense = session.exec(
-        select(Expense)
-        .where(Expense.id == expense_id)
-        .where(Expense.project_id == project_id)
-    ).first()
+    # Verificar que el gasto existe en el proyecto y obtener su link
+    expense, link = get_expense_with_link(session=session, project_id=project_id, expense_id=expense_id)
 
     if not expense:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found in this project")
 
     # Verificar Link
-    link = session.exec(
-        select(ProjectExpenseLink)
-        .where(ProjectExpenseLink.project_id == project_id)
-        .where(ProjectExpenseLink.expense_id == expense_id)
-    ).first()
     if not link:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not linked to this project")
 
@@ -121,18 +297,10 @@ def update_project_expense(
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    expense = session.exec(
-        select(Expense)
-        .where(Expense.id == expense_id)
-        .where(Expense.project_id == project_id)
-    ).first()
+    expense, link = get_expense_with_link(session=session, project_id=project_id, expense_id=expense_id)
 
     if not expense:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
-    link = session.exec( select(ProjectExpenseLink)
-        .where(ProjectExpenseLink.project_id == project_id)
-        .where(ProjectExpenseLink.expense_id == expense_id)
-    ).first()
     if not link:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not linked to this project")
 
@@ -172,10 +340,6 @@ def update_project_expense(
         session.add(link)
 
     session.add(expense)
-    session.commit()
-    session.refresh(expense)
-    if link:
-        session.refresh(link)
 
     # Verificar si ha habido cambios
     changes = {}
@@ -191,40 +355,127 @@ def update_project_expense(
 
     # Si ha habido cambios, notificar
     if changes:
-        notify_expense_update( session=session, expense=expense, update_data=changes)
+        notify_expense_update( session=session, expense=expense, title_project=project.title, update_data=changes)
+
+    session.commit()
+    session.refresh(expense)
+    if link:
+        session.refresh(link)
 
     return expense_to_out(expense=expense, link=link)
 
-def update_expenses_in_project(
+def validate_expense_changes(
         session: Session,
         project_id: int,
         expenses_data: list[ExpenseBackend]
+) -> Dict[int, tuple[Expense, ProjectExpenseLink | None]]:
+    """
+    Valida todos los cambios de gastos de un ProjectUpdate antes de escribir nada.
+    Devuelve los gastos existentes afectados, con su relación con el proyecto, por id.
+    """
+    existing_ids = {expense.id for expense in expenses_data if expense.updated or not expense.created}
+    expenses = {
+        expense.id: (expense, link) for expense, link in session.exec(
+            select(Expense, ProjectExpenseLink)
+            .outerjoin(
+                ProjectExpenseLink,
+                and_(ProjectExpenseLink.expense_id == Expense.id, ProjectExpenseLink.project_id == project_id)
+            )
+            .where(Expense.project_id == project_id, Expense.id.in_(existing_ids))
+        ).all()
+    } if existing_ids else {}
+    missing = existing_ids - set(expenses)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Expenses not found in this project: {sorted(missing)}"
+        )
+
+    for expense_data in expenses_data:
+        if expense_data.updated and expenses[expense_data.id][1] is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not linked to this project")
+        if not expense_data.updated and expense_data.created:
+            ExpenseCreate.model_validate(expense_data)
+
+    return expenses
+
+
+def apply_expense_changes(
+        session: Session,
+        project: Project,
+        expenses_data: list[ExpenseBackend],
+        expenses: Dict[int, tuple[Expense, ProjectExpenseLink | None]]
 ):
-    """Actualiza múltiples gastos en un proyecto"""
+    """Aplica los cambios de gastos ya validados sin hacer commit (ver apply_task_changes)."""
+    now = datetime.now(timezone.utc)
+    changes = {}
+    new_expenses = []
+    deleted_ids = []
     for expense_data in expenses_data:
-        # Revisar Booleanos que indican si es una actualización o creación
         if expense_data.updated:
-            # Actualizar gasto existente
-            update_project_expense(
-                session=session,
-                project_id=project_id,
-                expense_id=expense_data.id,
-                expense_data=ExpenseUpdate.model_validate(expense_data)
-            )
+            expense, link = expenses[expense_data.id]
+            update_data = expense_data.model_dump(exclude_unset=True, include=set(ExpenseUpdate.model_fields))
+            expense_changes = {}
+            for key, value in update_data.items():
+                target = expense if hasattr(expense, key) else link if hasattr(link, key) else None
+                if target is None:
+                    continue
+                if getattr(target, key) != value:
+                    expense_changes[key] = {"old": getattr(target, key), "new": value}
+                setattr(target, key, value)
+                if target is link:
+                    link.updated_at = now
+            expense.updated_at = now
+            changes[expense.id] = expense_changes
         elif expense_data.created:
-            # Crear nuevo gasto
-            create_project_expense(
+            create_data = ExpenseCreate.model_validate(expense_data)
+            new_expenses.append((
+                Expense(**create_data.model_dump(exclude_unset=True), project_id=project.id),
+                create_data
+            ))
+        else:
+            deleted_ids.append(expense_data.id)
+
+    session.add_all([expense for expense, _ in new_expenses])
+    session.flush()
+    session.add_all([
+        ProjectExpenseLink(
+            project_id=project.id,
+            expense_id=expense.id,
+            approved_by=create_data.approved_by,
+            notes=create_data.notes
+        ) for expense, create_data in new_expenses
+    ])
+
+    for expense_id, expense_changes in changes.items():
+        if expense_changes:
+            notify_expense_update(
                 session=session,
-                project_id=project_id,
-                expense_data=ExpenseCreate.model_validate(expense_data)
+                expense=expenses[expense_id][0],
+                title_project=project.title,
+                update_data=expense_changes
             )
-        else:
-            # Eliminar gasto existente
-            delete_project_expense(
+    for expense, _ in new_expenses:
+        send_expense_notifications(session=session, project_id=project.id, title_project=project.title, expense=expense)
+
+    if deleted_ids:
+        for expense_id in deleted_ids:
+            expense = expenses[expense_id][0]
+            notify_expense_deletion(
                 session=session,
-                project_id=project_id,
-                expense_id=expense_data.id
+                project_id=project.id,
+                title_project=project.title,
+                expense_data={
+                    "id": expense.id,
+                    "title": expense.title,
+                    "amount": expense.amount,
+                    "category": expense.category
+                }
             )
+        # Las actividades anteriores conservan el historial pero dejan de apuntar al gasto
+        session.exec(update(Activity).where(Activity.expense_id.in_(deleted_ids)).values(expense_id=None))
+        session.exec(delete(ProjectExpenseLink).where(ProjectExpenseLink.expense_id.in_(deleted_ids)))
+        session.exec(delete(Expense).where(Expense.id.in_(deleted_ids)))
 
 def delete_project_expense(
         session: Session,
@@ -236,20 +487,11 @@ def delete_project_expense(
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    # Verificar que el gasto existe en el proyecto
-    expense = session.exec(
-        select(Expense)
-        .where(Expense.id == expense_id)
-        .where(Expense.project_id == project_id)
-    ).first()
+    # Verificar que el gasto existe en el proyecto (junto a su relación con el proyecto)
+    expense, link = get_expense_with_link(session=session, project_id=project_id, expense_id=expense_id)
     if not expense:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found in this project")
 
-    # Eliminar la relación entre el proyecto y el gasto
-    link = session.exec( select(ProjectExpenseLink)
-        .where(ProjectExpenseLink.project_id == project_id)
-        .where(ProjectExpenseLink.expense_id == expense_id)
-    ).first()
     # Guardar datos antes de borrar
     expense_data = {
         "id": expense.id,
@@ -261,11 +503,12 @@ def delete_project_expense(
     session.delete(expense)
     if link:
         session.delete(link)
-    session.commit()
     
     # Notificar eliminación
     notify_expense_deletion(
         session=session,
         project_id=project_id,
+        title_project=project.title,
         expense_data=expense_data
-    )
\ No newline at end of file
+    )
+    session.commit()
\ No newline at end of file
@@ -1,20 +1,28 @@
 """ Follow CRUD operations. """
+import logging
+
 from fastapi import HTTPException
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from app.models.user import Follow, User, Worker, WorkerRead
 
+logger = logging.getLogger(__name__)
+
 
+# Cada lista carga de antemano el "otro" usuario que usa FollowOut.from_follow (evita un SELECT por follow)
 def get_followers(*, session: Session, user_id: int):
-    return session.exec(select(Follow).where(Follow.following_id == user_id, Follow.status == "ACCEPTED")).all()
+    return session.exec(select(Follow).where(Follow.following_id == user_id, Follow.status == "ACCEPTED")
+                        .options(selectinload(Follow.follower))).all()
 
 
 def get_following(*, session: Session, user_id: int):
-    return session.exec(select(Follow).where(Follow.follower_id == user_id, Follow.status == "ACCEPTED")).all()
+    return session.exec(select(Follow).where(Follow.follower_id == user_id, Follow.status == "ACCEPTED")
+                        .options(selectinload(Follow.following))).all()
 
 
 def get_follow_requests(*, session: Session, user_id: int):
-    return session.exec(select(Follow).where(Follow.following_id == user_id, Follow.status == "PENDING")).all()
+    return session.exec(select(Follow).where(Follow.following_id == user_id, Follow.status == "PENDING")
+                        .options(selectinload(Follow.follower))).all()
 
 def get_follows_bd_relationship(*, session: Session, user_id: int):
     """
@@ -55,7 +63,7 @@ def follow_user(*, session: Session, follower_id: int, following_id: int):
         select(Follow).where(Follow.follower_id == follower_id, Follow.following_id == following_id)).first()
     # If it exists and is accepted, return None
     if existing_follow:
-        print("[Follow CRUD] => relationship already exists.")
+        logger.debug("Follow relationship %s -> %s already exists", follower_id, following_id)
         # Devolver directamente el Array de Followes
         return get_followers(session=session, user_id=follower_id)
 
@@ -71,11 +79,11 @@ def follow_user(*, session: Session, follower_id: int, following_id: int):
         session.add(new_follow)
         session.commit()
         session.refresh(new_follow)
-        print("[Follow CRUD] => relationship added successfully.")
+        logger.debug("Follow relationship %s -> %s added", follower_id, following_id)
         return get_followers(session=session, user_id=follower_id)
     except Exception as e:
         session.rollback()
-        print(f"[Follow CRUD] => Failed to add follow relationship: {e}")
+        logger.exception("Failed to add follow relationship %s -> %s", follower_id, following_id)
         return None
 
 
@@ -167,6 +175,7 @@ def get_workers_follows(session: Session, user_id: int):
         .where(Worker.user_id.in_(worker_ids))
         .options(
             selectinload(Worker.user),
+            selectinload(Worker.skills),
             selectinload(Worker.projects),
             selectinload(Worker.tasks)
         )
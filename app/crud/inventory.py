@@ -1,12 +1,19 @@
-from typing import Dict
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
 
 from fastapi import HTTPException
 from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
-from app.crud.notification import send_inventory_notifications, notify_inventory_update, notify_inventory_deletion
+from app.core.config import settings
+from app.core.records import ExportFormat, Record, RecordError, iter_record_batches, record_format, stream_records
+from app.crud.notification import send_inventory_notifications, notify_inventory_update, notify_inventory_deletion, \
+    send_inventory_import_notification
+from app.models.bulk import ImportReport
+from app.models.activity import Activity
 from app.models.inventory import (InventoryItem, InventoryItemCreate, InventoryItemUpdate,
                                   InventoryCategory, InventoryStatus, InventoryBackend)
 from app.models.project import Project
@@ -28,6 +35,22 @@ def get_inventory(
     return inventory
 
 
+async def get_inventory_async(
+    session: AsyncSession,
+    project_id: int = None,
+) -> list[InventoryItem]:
+    """Variante asíncrona de get_inventory"""
+    inventory = (await session.exec(
+        select(InventoryItem)
+        .where(InventoryItem.project_id == project_id)
+    )).all()
+
+    if not inventory:
+        raise HTTPException(status_code=404, detail="Inventory not found")
+
+    return inventory
+
+
 def create_inventory_item(
     session: Session,
     project_id: int,
@@ -57,19 +80,166 @@ def create_inventory_item(
     new_item = InventoryItem( **item_data.model_dump (exclude_unset=True) )
 
     session.add(new_item)
-    session.commit()
-    session.refresh(new_item)
+    session.flush()
 
-    # Send notifications
+    # Send notifications (en la misma transacción que el item)
     send_inventory_notifications(
         session=session,
         project_id=project_id,
+        title_project=project.title,
         inventory_item=new_item
     )
+    session.commit()
+    session.refresh(new_item)
 
     return new_item
 
 
+def import_inventory_batch(
+    session: Session,
+    project_id: int,
+    records: List[Record],
+    report: ImportReport
+):
+    """
+    Upsert de un lote de filas importadas por (project_id, name), sin hacer commit:
+    los items nuevos se insertan y en los existentes se actualizan total y unit_cost.
+    Dentro del lote, si un nombre se repite gana la última fila. Una fila que deja el total
+    por debajo de lo ya usado se rechaza.
+    """
+    items_data: Dict[str, tuple[int, InventoryItemCreate]] = {}
+    for row, record in records:
+        if isinstance(record, RecordError):
+            report.add_error(row, record)
+            continue
+        # InventoryItemCreate no aplica el alias "unitCost" al validar un dict: se acepta igualmente
+        if "unitCost" in record and "unit_cost" not in record:
+            record["unit_cost"] = record.pop("unitCost")
+        record["project_id"] = project_id
+        try:
+            item_data = InventoryItemCreate.model_validate(record)
+        except ValidationError as e:
+            report.add_error(row, e)
+            continue
+        items_data[item_data.name.lower()] = (row, item_data)
+    if not items_data:
+        return
+
+    # Una sola consulta para todo el lote. Los nombres se comparan en minúsculas, en SQL y en Python,
+    # como en validate_inventory_changes: no depende de la collation de la base de datos.
+    existing = {
+        item.name.lower(): item for item in session.exec(
+            select(InventoryItem.id, InventoryItem.name, InventoryItem.total, InventoryItem.used, InventoryItem.unit_cost)
+            .where(InventoryItem.project_id == project_id)
+            .where(func.lower(InventoryItem.name).in_(list(items_data)))
+        ).all()
+    }
+
+    new_items = []
+    updates = []
+    for key, (row, item_data) in items_data.items():
+        item = existing.get(key)
+        if item is None:
+            new_items.append({**item_data.model_dump(), "used": 0, "remaining": item_data.total})
+        elif item_data.total < item.used:
+            report.add_error(row, ValueError(
+                f"total: {item_data.total:g} is below the {item.used:g} already used of {item.name}"
+            ))
+        elif (item.total, item.unit_cost) != (item_data.total, item_data.unit_cost):
+            updates.append({
+                "id": item.id,
+                "total": item_data.total,
+                "unit_cost": item_data.unit_cost,
+                "remaining": item_data.total - item.used
+            })
+
+    if new_items:
+        session.execute(insert(InventoryItem), new_items)
+    if updates:
+        session.execute(update(InventoryItem), updates)  # UPDATE por clave primaria en lote
+
+    report.imported += len(new_items)
+    report.updated += len(updates)
+
+
+def finish_inventory_import(session: Session, project: Project, report: ImportReport):
+    if report.imported or report.updated:
+        send_inventory_import_notification(
+            session=session,
+            project_id=project.id,
+            title_project=project.title,
+            imported=report.imported,
+            updated=report.updated
+        )
+    session.commit()
+
+
+async def import_project_inventory(
+    session: AsyncSession,
+    project_id: int,
+    chunks: AsyncIterable[bytes],
+    content_type: Optional[str]
+) -> ImportReport:
+    """
+    CRUD: Importa una hoja de proveedor (CSV o NDJSON en streaming) al inventario del proyecto,
+    por lotes de BULK_IMPORT_BATCH_SIZE (con run_sync) y en una sola transacción.
+    """
+    record_format(content_type)  # Rechaza el formato antes de leer el cuerpo
+
+    project = await session.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    report = ImportReport()
+    try:
+        async for records in iter_record_batches(chunks, content_type, settings.BULK_IMPORT_BATCH_SIZE):
+            await session.run_sync(import_inventory_batch, project_id, records, report)
+        await session.run_sync(finish_inventory_import, project, report)
+    except HTTPException:
+        await session.rollback()
+        raise
+    except UnicodeDecodeError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail=f"Error importing inventory, {e}")
+
+    return report
+
+
+# Columnas del export; mismos nombres que acepta el import
+INVENTORY_EXPORT_COLUMNS = {
+    "id": InventoryItem.id,
+    "name": InventoryItem.name,
+    "category": InventoryItem.category,
+    "total": InventoryItem.total,
+    "used": InventoryItem.used,
+    "remaining": InventoryItem.remaining,
+    "unit": InventoryItem.unit,
+    "unit_cost": InventoryItem.unit_cost,
+    "supplier": InventoryItem.supplier,
+    "status": InventoryItem.status,
+}
+
+
+async def export_project_inventory(
+    session: AsyncSession,
+    project_id: int,
+    export_format: ExportFormat
+) -> AsyncIterator[str]:
+    """CRUD: Inventario del proyecto en CSV o NDJSON, leído en streaming por orden de id."""
+    if not await session.get(Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    statement = (
+        select(*INVENTORY_EXPORT_COLUMNS.values())
+        .where(InventoryItem.project_id == project_id)
+        .order_by(InventoryItem.id)
+    )
+    return stream_records(session.bind, statement, list(INVENTORY_EXPORT_COLUMNS), export_format)
+
+
 def update_inventory_item(
     session: Session,
     project_id: int,
@@ -116,48 +286,119 @@ def update_inventory_item(
         setattr(existing_item, key, value)
 
     session.add(existing_item)
-    session.commit()
-    session.refresh(existing_item)
 
     # Send notifications
     notify_inventory_update(
         session=session,
         inventory_item=existing_item,
+        title_project=project.title,
         update_data={
             k: {"old": getattr(old_item_data, k), "new": v}
             for k, v in item_data.model_dump(exclude_unset=True).items()
             if getattr(old_item_data, k) != v
         }
     )
+    session.commit()
+    session.refresh(existing_item)
 
     return existing_item
 
-def update_inventories_in_project(
+def validate_inventory_changes(
         session: Session,
         project_id: int,
         inventories_data: list[InventoryBackend]
+) -> Dict[int, InventoryItem]:
+    """
+    Valida todos los cambios de inventario de un ProjectUpdate antes de escribir nada.
+    Devuelve los items existentes afectados (actualizados o eliminados) por id.
+    """
+    existing_ids = {item.id for item in inventories_data if item.updated or not item.created}
+    items = {
+        item.id: item for item in session.exec(
+            select(InventoryItem)
+            .where(InventoryItem.project_id == project_id, InventoryItem.id.in_(existing_ids))
+        ).all()
+    } if existing_ids else {}
+    missing = existing_ids - set(items)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Items not found in this project: {sorted(missing)}")
+
+    # Los items nuevos se validan completos y no pueden repetir nombre (sin distinguir mayúsculas) en el proyecto
+    names = set(session.exec(
+        select(func.lower(InventoryItem.name)).where(InventoryItem.project_id == project_id)
+    ).all())
+    for item_data in inventories_data:
+        if item_data.updated or not item_data.created:
+            continue
+        InventoryItemCreate.model_validate(item_data)
+        if item_data.name.lower() in names:
+            raise HTTPException(status_code=409, detail="Item already exists in this project")
+        names.add(item_data.name.lower())
+
+    return items
+
+
+def apply_inventory_changes(
+        session: Session,
+        project: Project,
+        inventories_data: list[InventoryBackend],
+        items: Dict[int, InventoryItem]
 ):
-    """Actualiza los items de inventario en un proyecto"""
-    for inventory_data in inventories_data:
-        if inventory_data.updated:
-            update_inventory_item(
-                session=session,
-                project_id=project_id,
-                item_id=inventory_data.id,
-                item_data=InventoryItemUpdate.model_validate(inventory_data)
-            )
-        elif inventory_data.created:
-            create_inventory_item(
-                session=session,
-                project_id=project_id,
-                item_data=InventoryItemCreate.model_validate(inventory_data)
-            )
+    """Aplica los cambios de inventario ya validados sin hacer commit (ver apply_task_changes)."""
+    changes = {}
+    new_items = []
+    deleted_ids = []
+    for item_data in inventories_data:
+        if item_data.updated:
+            item = items[item_data.id]
+            update_data = item_data.model_dump(exclude_unset=True, include=set(InventoryItemUpdate.model_fields))
+            changes[item.id] = {
+                k: {"old": getattr(item, k), "new": v}
+                for k, v in update_data.items()
+                if getattr(item, k) != v
+            }
+            for key, value in update_data.items():
+                setattr(item, key, value)
+        elif item_data.created:
+            new_items.append(InventoryItem(
+                **InventoryItemCreate.model_validate(item_data).model_dump(exclude_unset=True)
+                | {"project_id": project.id}
+            ))
         else:
-            delete_inventory_item(
+            deleted_ids.append(item_data.id)
+
+    session.add_all(new_items)
+    session.flush()
+
+    for item_id, item_changes in changes.items():
+        notify_inventory_update(
+            session=session, inventory_item=items[item_id], title_project=project.title, update_data=item_changes
+        )
+    for item in new_items:
+        send_inventory_notifications(
+            session=session, project_id=project.id, title_project=project.title, inventory_item=item
+        )
+
+    if deleted_ids:
+        for item_id in deleted_ids:
+            item = items[item_id]
+            notify_inventory_deletion(
                 session=session,
-                project_id=project_id,
-                item_id=inventory_data.id
+                inventory_data={
+                    "name": item.name,
+                    "unit": item.unit,
+                    "unit_cost": item.unit_cost,
+                    "total": item.total,
+                    "used": item.used
+                },
+                project_id=project.id,
+                title_project=project.title
             )
+        # Las actividades anteriores conservan el historial pero dejan de apuntar al item
+        session.exec(
+            update(Activity).where(Activity.inventory_item_id.in_(deleted_ids)).values(inventory_item_id=None)
+        )
+        session.exec(delete(InventoryItem).where(InventoryItem.id.in_(deleted_ids)))
 
 
 def delete_inventory_item(
@@ -195,12 +436,13 @@ def delete_inventory_item(
             "used": existing_item.used
         }
         session.delete(existing_item)
-        session.commit()
         notify_inventory_deletion(
             session=session,
             inventory_data=copy_important_data,
-            project_id=project_id
+            project_id=project_id,
+            title_project=project.title
         )
+        session.commit()
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar el item de inventario")
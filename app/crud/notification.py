@@ -1,28 +1,40 @@
-from datetime import datetime
-from typing import List
+import asyncio
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, case, insert, literal, or_, update
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
+from app.core.database import engine
 from app.models.expense import Expense
 from app.models.project import Project
 from app.models.project_client import ProjectClient
 from app.models.inventory import InventoryItem
 from app.models.task import Task
-from app.models.user import Client, Admin
-from app.models.activity import ActivityService, ActivityType, Activity
+from app.models.user import Client, Admin, UserRole
+from app.models.activity import ActivityService, ActivityType, Activity, ActivityRead, ActivityUnreadCounter, \
+    ActivityOut, ActivityOutList, MarkAllReadOut, UnreadCountOut, EXPENSE_ACTIVITY_TYPES
+
+logger = logging.getLogger(__name__)
+
 
 def send_task_notifications(
     session: Session,
     task: Task,
     worker_name: str,
-    project_id: int
+    project_id: int,
+    title_project: str
 ) -> List[Activity]:
     
     # Registrar actividad
     activity = ActivityService(session).log_activity(
         activity_type=ActivityType.TASK_CREATED,
         project_id=project_id,
+        title_project=title_project,
         task_id=task.id,
         metadatas={
             "title": task.title,
@@ -39,12 +51,14 @@ def send_task_notifications(
 def send_expense_notifications(
     session: Session,
     expense: Expense,
-    project_id: int
+    project_id: int,
+    title_project: str
 ) -> List[Activity]:
 
     activity = ActivityService(session).log_activity(
         activity_type=ActivityType.EXPENSE_ADDED,
         project_id=project_id,
+        title_project=title_project,
         expense_id=expense.id,
         metadatas={
             "id": expense.id,
@@ -60,14 +74,36 @@ def send_expense_notifications(
     return activity
 
 
+def send_expense_import_notification(
+    session: Session,
+    project_id: int,
+    title_project: str,
+    imported: int,
+    amount: float
+) -> Activity:
+    """Una única actividad resumen por importación en lugar de una por gasto."""
+    return ActivityService(session).log_activity(
+        activity_type=ActivityType.EXPENSE_ADDED,
+        project_id=project_id,
+        title_project=title_project,
+        metadatas={
+            "import": True,
+            "imported": imported,
+            "amount": amount
+        }
+    )
+
+
 def send_inventory_notifications(
     session: Session,
     project_id: int,
+    title_project: str,
     inventory_item: InventoryItem
 ) -> Activity:
     activity = ActivityService(session).log_activity(
         activity_type=ActivityType.INVENTORY_ADDED,
         project_id=project_id,
+        title_project=title_project,
         inventory_item_id=inventory_item.id,
         metadatas={
             "title": inventory_item.name,
@@ -86,10 +122,12 @@ def get_client_activities(
     session: Session,
     client_id: int,
     is_read: bool = None,
-    activity_type: ActivityType = None
-) -> List[Activity]:
+    activity_type: ActivityType = None,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> ActivityOutList:
     
-    """Obtiene actividades de un cliente específico"""
+    """Obtiene una página de actividades de un cliente específico"""
     # Verificar que el cliente existe
     client = session.get(Client, client_id)
     if not client:
@@ -107,37 +145,111 @@ def get_client_activities(
             status_code=404,
             detail="No projects found for this client"
         )
-    # Filtrar actividades por cliente y tipo
+    # Filtrar actividades por cliente, estado de lectura y tipo en la propia consulta
+    statement = filter_activities(
+        select(Activity).where(Activity.project_id.in_(projects)),
+        user_id=client.user_id,
+        is_read=is_read,
+        activity_type=activity_type
+    )
+    page = get_activity_page(session, statement, user_id=client.user_id, cursor=cursor, limit=limit)
+
+    if not page.activities:
+        raise HTTPException(
+            status_code=404,
+            detail="No activities found for this client"
+        )
+    return page
+
+
+def encode_activity_cursor(activity: Activity) -> str:
+    """Cursor opaco con la posición (created_at, id) de la última actividad de la página."""
+    created_at = activity.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    raw = f"{created_at.isoformat()}|{activity.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_activity_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, activity_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(activity_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
+
+
+def filter_activities(statement, user_id: int, is_read: bool = None, activity_type: ActivityType = None):
+    """Aplica los filtros opcionales del feed a la consulta de actividades."""
+    if is_read is not None:
+        read_ids = select(ActivityRead.activity_id).where(ActivityRead.user_id == user_id)
+        statement = statement.where(Activity.id.in_(read_ids) if is_read else Activity.id.not_in(read_ids))
+    if activity_type is not None:
+        statement = statement.where(Activity.activity_type == activity_type)
+    return statement
+
+
+def get_activity_page(
+    session: Session,
+    statement,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> ActivityOutList:
+    """
+    Devuelve una página del feed ordenada por (created_at, id) descendente (keyset):
+    `cursor` es el valor devuelto como next_cursor en la página anterior.
+    """
+    if cursor is not None:
+        created_at, activity_id = decode_activity_cursor(cursor)
+        statement = statement.where(
+            or_(
+                Activity.created_at < created_at,
+                and_(Activity.created_at == created_at, Activity.id < activity_id)
+            )
+        )
+
+    # Se pide un registro extra para saber si existe una página siguiente
     activities = session.exec(
-        select(Activity)
-        .where(Activity.project_id.in_(projects))
+        statement
         .options(
             selectinload(Activity.project),
             selectinload(Activity.task),
             selectinload(Activity.expense),
             selectinload(Activity.inventory_item)
         )
-        .order_by(Activity.created_at.desc())
+        .order_by(Activity.created_at.desc(), Activity.id.desc())
+        .limit(limit + 1)
     ).all()
-
-    # Filtrar actividades por estado de lectura y tipo
-    if is_read is not None:
-        activities = [activity for activity in activities if activity.is_read == is_read]
-    if activity_type is not None:
-        activities = [activity for activity in activities if activity.activity_type == activity_type]
-    if not activities:
-        raise HTTPException(
-            status_code=404,
-            detail="No activities found for this client"
+    has_more = len(activities) > limit
+    activities = activities[:limit]
+
+    # Estado de lectura del usuario solo para las actividades de la página
+    read_ids = set(session.exec(
+        select(ActivityRead.activity_id)
+        .where(
+            ActivityRead.user_id == user_id,
+            ActivityRead.activity_id.in_([activity.id for activity in activities])
         )
-    return activities
+    ).all()) if activities else set()
+
+    return ActivityOutList(
+        activities=[
+            ActivityOut.from_activity(activity, is_read=activity.id in read_ids) for activity in activities
+        ],
+        next_cursor=encode_activity_cursor(activities[-1]) if has_more else None
+    )
 
 
-def notify_task_deletion(session: Session, project_id: int, task_data: dict):
+def notify_task_deletion(session: Session, project_id: int, title_project: str, task_data: dict):
     """Notifica sobre eliminación de tarea"""
     ActivityService(session).log_activity(
         activity_type=ActivityType.TASK_DELETED,
         project_id=project_id,
+        title_project=title_project,
         metadatas={
             "deleted_task": task_data
         }
@@ -153,12 +265,13 @@ def serialize_update_data(update_data: dict) -> dict:
                     update_data[key][sub_key] = sub_value.isoformat()
     return update_data
 
-def notify_task_update(session: Session, task: Task, update_data: dict):
+def notify_task_update(session: Session, task: Task, title_project: str, update_data: dict):
     """Notifica sobre cambios en una tarea"""
     serialized_data = serialize_update_data(update_data)
     ActivityService(session).log_activity(
         activity_type=ActivityType.TASK_UPDATED,
         project_id=task.project_id,
+        title_project=title_project,
         task_id=task.id,
         metadatas={
             "title": task.title,
@@ -167,12 +280,13 @@ def notify_task_update(session: Session, task: Task, update_data: dict):
     )
 
 
-def notify_expense_update(session: Session, expense: Expense, update_data: dict):
+def notify_expense_update(session: Session, expense: Expense, title_project: str, update_data: dict):
 
     """Notifica sobre cambios en un gasto"""
     ActivityService(session).log_activity(
         activity_type=ActivityType.EXPENSE_UPDATED,
         project_id=expense.project_id,
+        title_project=title_project,
         expense_id=expense.id,
         metadatas={
                 "title": expense.title,
@@ -180,40 +294,62 @@ def notify_expense_update(session: Session, expense: Expense, update_data: dict)
             }
     )
 
-def notify_inventory_update(session: Session, inventory_item: InventoryItem, update_data: dict):
+def notify_inventory_update(session: Session, inventory_item: InventoryItem, title_project: str, update_data: dict):
     """Notifica sobre cambios en un item de inventario"""
     ActivityService(session).log_activity(
         activity_type=ActivityType.INVENTORY_UPDATED,
         project_id=inventory_item.project_id,
+        title_project=title_project,
         metadatas={
             "title": inventory_item.name,
             "changes": update_data
         }
     )
 
-def notify_expense_deletion(session: Session, project_id: int, expense_data: dict):
+def send_inventory_import_notification(
+    session: Session,
+    project_id: int,
+    title_project: str,
+    imported: int,
+    updated: int
+) -> Activity:
+    """Una única actividad resumen por importación de inventario."""
+    return ActivityService(session).log_activity(
+        activity_type=ActivityType.INVENTORY_UPDATED,
+        project_id=project_id,
+        title_project=title_project,
+        metadatas={
+            "import": True,
+            "imported": imported,
+            "updated": updated
+        }
+    )
+
+def notify_expense_deletion(session: Session, project_id: int, title_project: str, expense_data: dict):
     """Notifica sobre eliminación de gasto"""
     ActivityService(session).log_activity(
         activity_type=ActivityType.EXPENSE_DELETED,
         project_id=project_id,
+        title_project=title_project,
         metadatas={
             "deleted_expense": expense_data
         }
     )
 
 
-def notify_inventory_deletion(session: Session, inventory_data: dict, project_id: int):
+def notify_inventory_deletion(session: Session, inventory_data: dict, project_id: int, title_project: str):
     """Notifica sobre eliminación de item de inventario"""
     ActivityService(session).log_activity(
         activity_type=ActivityType.INVENTORY_DELETED,
         project_id=project_id,
+        title_project=title_project,
         metadatas={
             "deleted_item": inventory_data
         }
     )
 
-def get_user_activities(session: Session, user_id: int) -> List[Activity]:
-    """Retrieve activities associated with a user (Client or Admin)."""
+def get_user_feed_projects(session: Session, user_id: int) -> Tuple[List[int], bool]:
+    """Projects whose activity feed the user receives, and whether the user is a client."""
     # Determine if the user is a Client or Admin
     user = session.exec(select(Client).where(Client.user_id == user_id)).first()
     is_client = True if user else False
@@ -244,47 +380,31 @@ def get_user_activities(session: Session, user_id: int) -> List[Activity]:
             detail="No projects found for this user"
         )
 
+    return project_ids, is_client
+
+
+def get_user_activities(
+    session: Session,
+    user_id: int,
+    is_read: bool = None,
+    activity_type: ActivityType = None,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> ActivityOutList:
+    """Retrieve a page of activities associated with a user (Client or Admin)."""
+    project_ids, is_client = get_user_feed_projects(session, user_id)
+
     # Retrieve activities for the associated projects
-    # Filtrar actividades por cliente y tipo
-    expense_types = {
-        ActivityType.EXPENSE_ADDED,
-        ActivityType.EXPENSE_APPROVED,
-        ActivityType.EXPENSE_UPDATED,
-        ActivityType.EXPENSE_DELETED,
-    }
+    statement = select(Activity).where(Activity.project_id.in_(project_ids))
     if is_client:
         # Si es un cliente, excluir actividades de tipo gasto
-        activities = session.exec(
-            select(Activity)
-            .where(
-                Activity.project_id.in_(project_ids),
-                ~Activity.activity_type.in_(expense_types)
-            )
-            .options(
-                selectinload(Activity.task),
-                selectinload(Activity.project),
-                selectinload(Activity.expense),
-                selectinload(Activity.inventory_item)
-            )
-        ).all()
-    else:
-        # Siendo un admin, incluir todas las actividades
-        activities = session.exec(
-            select(Activity)
-            .where(Activity.project_id.in_(project_ids))
-            .options(
-                selectinload(Activity.task),
-                selectinload(Activity.project),
-                selectinload(Activity.expense),
-                selectinload(Activity.inventory_item)
-            )
-        ).all()
+        statement = statement.where(~Activity.activity_type.in_(EXPENSE_ACTIVITY_TYPES))
+    statement = filter_activities(statement, user_id=user_id, is_read=is_read, activity_type=activity_type)
 
+    return get_activity_page(session, statement, user_id=user_id, cursor=cursor, limit=limit)
 
-    return activities
 
-
-def mark_activity_as_read(session, activity_id):
+def mark_activity_as_read(session, activity_id, user_id):
     """Mark an activity as read for a specific user."""
     activity = session.get(Activity, activity_id)
     if not activity:
@@ -292,33 +412,108 @@ def mark_activity_as_read(session, activity_id):
             status_code=404,
             detail="Activity not found"
         )
+    # Solo se descuenta lo que unread_increments sumó: el admin todo, los clientes sin gastos
+    if not ActivityService(session).receives(activity, user_id):
+        raise HTTPException(
+            status_code=403,
+            detail="You do not have access to this activity"
+        )
 
-    # Mark the activity as read
-    activity.is_read = True
-    session.add(activity)
-    session.commit()
+    # Solo la primera lectura descuenta la actividad del contador del usuario (si ya se había sumado)
+    if not session.get(ActivityRead, (user_id, activity_id)):
+        session.add(ActivityRead(user_id=user_id, activity_id=activity_id))
+        if activity.dispatched:
+            session.exec(
+                update(ActivityUnreadCounter)
+                .where(
+                    ActivityUnreadCounter.user_id == user_id,
+                    ActivityUnreadCounter.project_id == activity.project_id,
+                    ActivityUnreadCounter.unread_count > 0
+                )
+                .values(unread_count=ActivityUnreadCounter.unread_count - 1)
+            )
+        session.commit()
 
-    return activity
+    return ActivityOut.from_activity(activity, is_read=True)
 
 
-def mark_all_activities_as_read(session, project_id):
-    """Mark all activities for a project as read."""
-    activities = session.exec(
-        select(Activity).where(Activity.project_id == project_id, Activity.is_read == False)
-    ).all()
+def mark_all_activities_as_read(session, project_id, user_id) -> MarkAllReadOut:
+    """
+    Mark all activities for a project as read for a specific user: un único
+    INSERT ... SELECT de las no leídas hasta ahora, sin cargarlas en memoria.
+    """
+    role = ActivityService(session).recipient_role(project_id, user_id)
+    if role is None:
+        raise HTTPException(
+            status_code=403,
+            detail="You do not have access to this project"
+        )
+    read_until = datetime.now(timezone.utc)
+
+    unread = (
+        select(literal(user_id), Activity.id, literal(read_until))
+        .where(
+            Activity.project_id == project_id,
+            Activity.created_at <= read_until,
+            Activity.dispatched == True,  # Las pendientes del outbox aún no cuentan como no leídas
+            Activity.id.not_in(select(ActivityRead.activity_id).where(ActivityRead.user_id == user_id))
+        )
+    )
+    # Los clientes no reciben actividades de gastos
+    if role == UserRole.CLIENT:
+        unread = unread.where(~Activity.activity_type.in_(EXPENSE_ACTIVITY_TYPES))
+
+    updated = session.exec(
+        insert(ActivityRead).from_select(["user_id", "activity_id", "read_at"], unread)
+    ).rowcount
 
-    if not activities:
+    if not updated:
         raise HTTPException(
             status_code=404,
             detail="No unread activities found for this project"
         )
 
-    # Mark all activities as read
-    for activity in activities:
-        activity.is_read = True
-        session.add(activity)
-
-    # Commit the changes
+    # Descontar solo lo marcado: las actividades registradas mientras tanto siguen sin leer
+    session.exec(
+        update(ActivityUnreadCounter)
+        .where(ActivityUnreadCounter.user_id == user_id, ActivityUnreadCounter.project_id == project_id)
+        .values(unread_count=case(
+            (ActivityUnreadCounter.unread_count > updated, ActivityUnreadCounter.unread_count - updated),
+            else_=0
+        ))
+    )
     session.commit()
 
-    return activities
\ No newline at end of file
+    return MarkAllReadOut(updated=updated, read_until=read_until)
+
+
+def get_unread_count(session: Session, user_id: int) -> UnreadCountOut:
+    """Actividades sin leer del usuario, leídas de sus contadores por proyecto (sin recorrer Activity)."""
+    counters = session.exec(
+        select(ActivityUnreadCounter.project_id, ActivityUnreadCounter.unread_count)
+        .where(ActivityUnreadCounter.user_id == user_id, ActivityUnreadCounter.unread_count > 0)
+    ).all()
+
+    return UnreadCountOut(
+        total=sum(unread_count for _, unread_count in counters),
+        projects={project_id: unread_count for project_id, unread_count in counters}
+    )
+
+
+def dispatch_activity_outbox(batch_size: int) -> int:
+    """Reparte un lote de actividades pendientes del outbox en su propia sesión."""
+    with Session(engine) as session:
+        return ActivityService(session).dispatch_pending(batch_size=batch_size)
+
+
+async def run_activity_outbox(interval: float, batch_size: int):
+    """Drena el outbox de actividades en segundo plano mientras la aplicación está en marcha."""
+    while True:
+        try:
+            dispatched = await run_in_threadpool(dispatch_activity_outbox, batch_size)
+        except Exception:
+            logger.exception("Error dispatching the activity outbox")
+            dispatched = 0
+        # Lote completo: probablemente quedan más pendientes, se sigue sin esperar
+        if dispatched < batch_size:
+            await asyncio.sleep(interval)
@@ -1,23 +1,30 @@
-from typing import Dict
+import logging
+from typing import Dict, Optional
 
 from fastapi import HTTPException
 from pydantic import ValidationError
+from sqlalchemy import delete, func
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
-from app.crud.expense import expense_to_out, update_expenses_in_project
-from app.crud.inventory import update_inventories_in_project
-from app.crud.task import update_tasks_in_project
-from app.models.expense import ExpenseStatus
-from app.models.project import Project, ProjectCreate, ProjectUpdate, ProjectOut, team_member_to_out
+from app.crud.expense import expense_to_out, get_expense_links, validate_expense_changes, apply_expense_changes
+from app.crud.inventory import validate_inventory_changes, apply_inventory_changes
+from app.crud.task import validate_task_changes, apply_task_changes
+from app.models.activity import activity_batch
+from app.models.expense import Expense, ExpenseStatus
+from app.models.project import Project, ProjectCreate, ProjectUpdate, ProjectOut, ProjectFigures, \
+    ProjectSummaryOut, ProjectSummaryPage, team_member_to_out
 from app.models.project_client import ProjectClient
 from app.models.project_expense import ProjectExpenseLink
 from app.models.project_team import ProjectTeamLink
-from app.models.task import TaskStatus, task_to_out
+from app.models.task import Task, TaskStatus, task_to_out
 from app.models.user import Admin, Client, Worker, team_out, TeamOut, ClientSimpleOut, WorkerRead, User, UserRole, \
     WorkerDataBackend
 
+logger = logging.getLogger(__name__)
+
 
 def get_project_id(*, session: Session, project_id: int) -> Project | None:
     # Consulta el proyecto con el ID proporcionado, incluyendo las relaciones de equipo y tareas
@@ -121,57 +128,60 @@ def add_client_to_project(
 
 
 def update_project(*, session: Session, project_id: int, project_data: ProjectUpdate) -> Project:
+    """
+    Actualiza el proyecto y aplica las listas *_backend (equipo, tareas, inventario y
+    gastos) en una sola transacción: primero se valida el conjunto completo de cambios
+    y después se escriben con operaciones por lotes, de modo que un error no deja
+    cambios a medias.
+    """
     # Busca el proyecto por ID
     project = session.exec(select(Project).where(Project.id == project_id)).first()
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Actualiza los campos del proyecto con los datos proporcionados
-    for key, value in project_data.model_dump(exclude_unset=True).items():
-        if hasattr(project, key):
-            setattr(project, key, value)
-
-    # Actualiza la fecha de modificación
-    project.updated_at = datetime.now(timezone.utc)
+    team_data = project_data.team_backend or []
+    tasks_data = project_data.tasks_backend or []
+    inventories_data = project_data.inventory_backend or []
+    expenses_data = project_data.expenses_backend or []
 
     try:
-        session.add(project)  # Agrega el proyecto actualizado a la sesión
-        session.commit()  # Guarda los cambios en la base de datos
-        session.refresh(project)  # Refresca el objeto para obtener los datos actualizados
-
-        # Verficar los cambios de TASKS
-        if project_data.tasks_backend:
-            update_tasks_in_project(
-                session=session,
-                project_id=project_id,
-                tasks_data=project_data.tasks_backend,
-                admin_id=project.admin_id
-            )
-        # Verifica si se han actualizado el Inventory
-        if project_data.inventory_backend:
-            update_inventories_in_project(
-                session=session,
-                project_id=project_id,
-                inventories_data=project_data.inventory_backend
-            )
+        # Validación de todos los cambios antes de escribir nada
+        team_ids, workers = validate_team_changes(session=session, project_id=project_id, team_data=team_data)
+        tasks = validate_task_changes(
+            session=session, project_id=project_id, tasks_data=tasks_data, team_ids=team_ids
+        )
+        inventory_items = validate_inventory_changes(
+            session=session, project_id=project_id, inventories_data=inventories_data
+        )
+        expenses = validate_expense_changes(session=session, project_id=project_id, expenses_data=expenses_data)
 
-        if project_data.team_backend:
-            updated_project_team(
-                session=session,
-                project_id=project_id,
-                team_data=project_data.team_backend
-            )
+        # Actualiza los campos del proyecto con los datos proporcionados
+        for key, value in project_data.model_dump(exclude_unset=True).items():
+            if hasattr(project, key):
+                setattr(project, key, value)
+
+        # Actualiza la fecha de modificación
+        project.updated_at = datetime.now(timezone.utc)
+        session.add(project)
 
-        if project_data.expenses_backend:
-            update_expenses_in_project(
-                session=session,
-                project_id=project_id,
-                expenses_data=project_data.expenses_backend
+        with activity_batch(session):
+            apply_team_changes(session=session, project_id=project_id, team_data=team_data, workers=workers)
+            apply_task_changes(
+                session=session, project=project, tasks_data=tasks_data, tasks=tasks, admin_id=project.admin_id
             )
+            apply_inventory_changes(
+                session=session, project=project, inventories_data=inventories_data, items=inventory_items
+            )
+            apply_expense_changes(session=session, project=project, expenses_data=expenses_data, expenses=expenses)
 
+        session.commit()  # Un único commit para el proyecto y todas sus listas
+        session.refresh(project)
 
         return project
+    except HTTPException:
+        session.rollback()
+        raise
     except ValidationError as e:
         session.rollback()  # Revierte los cambios en caso de error
         raise HTTPException(status_code=422, detail=f"Validation error: {e.errors()}")
@@ -180,28 +190,59 @@ def update_project(*, session: Session, project_id: int, project_data: ProjectUp
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def updated_project_team(
+def validate_team_changes(
         session: Session,
         project_id: int,
         team_data: list[WorkerDataBackend]
+) -> tuple[set[int], Dict[int, Worker]]:
+    """
+    Valida los cambios de equipo de un ProjectUpdate. Devuelve el equipo resultante
+    (ids de worker) y los workers que se añaden.
+    """
+    team_ids = set(session.exec(
+        select(ProjectTeamLink.worker_id).where(ProjectTeamLink.project_id == project_id)
+    ).all())
+    added_ids = {worker_data.id for worker_data in team_data if worker_data.created}
+    removed_ids = {worker_data.id for worker_data in team_data if not worker_data.created and worker_data.deleted}
+
+    workers = {
+        worker.id: worker
+        for worker in session.exec(select(Worker).where(Worker.id.in_(added_ids))).all()
+    } if added_ids else {}
+    if added_ids - set(workers):
+        raise HTTPException(status_code=404, detail="Worker not found")
+    if added_ids & team_ids:
+        raise HTTPException(status_code=400, detail="Worker already in project team")
+    if removed_ids - team_ids:
+        raise HTTPException(status_code=404, detail="Worker not found in project team")
+
+    return (team_ids - removed_ids) | added_ids, workers
+
+
+def apply_team_changes(
+        session: Session,
+        project_id: int,
+        team_data: list[WorkerDataBackend],
+        workers: Dict[int, Worker]
 ):
-    """ Actualiza el equipo de un proyecto con los datos proporcionados."""
+    """Aplica los cambios de equipo ya validados sin hacer commit."""
+    removed_ids = []
     for worker_data in team_data:
         if worker_data.created:
-            # Si el trabajador es nuevo, lo agregamos al proyecto
-            add_worker_to_project(
-                session=session,
-                project_id=project_id,
-                worker_id=worker_data.id,
-                role=worker_data.role
-            )
+            worker = workers[worker_data.id]
+            # Si el trabajador no tiene especialidad, se asigna el rol proporcionado como su especialidad
+            if not worker.specialty:
+                worker.specialty = worker_data.role
+            session.add(ProjectTeamLink(project_id=project_id, worker_id=worker.id, role=worker.specialty))
         elif worker_data.deleted:
-            # Si el trabajador es eliminado, lo quitamos del proyecto
-            remove_worker_from_project(
-                session=session,
-                project_id=project_id,
-                worker_id=worker_data.worker_id
-            )
+            removed_ids.append(worker_data.id)
+
+    if removed_ids:
+        session.exec(
+            delete(ProjectTeamLink)
+            .where(ProjectTeamLink.project_id == project_id, ProjectTeamLink.worker_id.in_(removed_ids))
+        )
+
 
 def add_worker_to_project(session: Session, project_id: int, worker_id: int, role: str = "Team Member") -> TeamOut:
     # Verifica si el proyecto existe
@@ -284,7 +325,8 @@ def delete_project(session, project_id):
     session.commit()
 
 
-def get_projects(session: Session, user_id: int) -> list[ProjectOut]:
+def user_projects_statement(session: Session, user_id: int, *columns):
+    """SELECT de las columnas indicadas restringido a los proyectos visibles para el usuario."""
     user = session.exec(
         select(User).where(User.id == user_id).options(
             selectinload(User.admin_profile),
@@ -294,57 +336,192 @@ def get_projects(session: Session, user_id: int) -> list[ProjectOut]:
     ).first()
 
     if user.role == UserRole.ADMIN:
-        projects = session.exec(
-            select(Project.id).where(Project.admin_id == user.admin_profile.id)
-        ).all()
+        return select(*columns).where(Project.admin_id == user.admin_profile.id)
 
     elif user.role == UserRole.CLIENT:
         # Si el usuario es un cliente, obtenemos los proyectos asociados a él
-        projects = session.exec(
-            select(Project.id)
+        return (
+            select(*columns)
             .join(ProjectClient)
             .where(ProjectClient.client_id == user.client_profile.id)
-        ).all()
+        )
+
+    # Si el usuario es un trabajador, obtenemos los proyectos asociados a él
+    return (
+        select(*columns)
+        .join(ProjectTeamLink)
+        .where(ProjectTeamLink.worker_id == user.id)
+    )
+
 
-    else:
-        # Si el usuario es un trabajador, obtenemos los proyectos asociados a él
-        projects = session.exec(
-            select(Project.id)
-            .join(ProjectTeamLink)
-            .where(ProjectTeamLink.worker_id == user.id)
-        ).all()
+def get_projects(session: Session, user_id: int) -> list[ProjectOut]:
+    projects = session.exec(user_projects_statement(session, user_id, Project.id)).all()
 
     if not projects:
         return []
 
-    return [get_project_details(session=session, project_id=ids) for ids in projects]
+    return get_projects_details(session=session, project_ids=projects)
+
+
+def get_projects_summary_page(
+        session: Session,
+        user_id: int,
+        cursor: Optional[int] = None,
+        limit: int = 20
+) -> ProjectSummaryPage:
+    """
+    Devuelve una página del listado ligero de proyectos, paginada por Project.id
+    (keyset): `cursor` es el id del último proyecto de la página anterior.
+    """
+    statement = user_projects_statement(
+        session, user_id, Project.id, Project.title, Project.status, Project.limit_budget
+    )
+    if cursor is not None:
+        statement = statement.where(Project.id > cursor)
+
+    # Se pide un registro extra para saber si existe una página siguiente
+    rows = session.exec(statement.order_by(Project.id).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    figures = get_projects_summary(session=session, project_ids=[row.id for row in rows])
+
+    return ProjectSummaryPage(
+        projects=[
+            ProjectSummaryOut(
+                id=row.id, title=row.title, status=row.status, limit_budget=row.limit_budget,
+                currentSpent=figures[row.id].currentSpent, progress=figures[row.id].progress
+            ) for row in rows
+        ],
+        next_cursor=rows[-1].id if has_more else None
+    )
+
+
+async def get_projects_async(session: AsyncSession, user_id: int) -> list[ProjectOut]:
+    """Variante asíncrona de get_projects."""
+    return await session.run_sync(lambda sync_session: get_projects(session=sync_session, user_id=user_id))
+
+
+async def get_projects_summary_page_async(
+        session: AsyncSession,
+        user_id: int,
+        cursor: Optional[int] = None,
+        limit: int = 20
+) -> ProjectSummaryPage:
+    """Variante asíncrona de get_projects_summary_page."""
+    return await session.run_sync(
+        lambda sync_session: get_projects_summary_page(
+            session=sync_session, user_id=user_id, cursor=cursor, limit=limit
+        )
+    )
+
+
+def _project_out_options():
+    """Relaciones que necesita ProjectOut, cargadas con un SELECT ... IN por nivel."""
+    return (
+        selectinload(Project.admin).selectinload(Admin.user),
+        selectinload(Project.clients).selectinload(Client.user),
+        selectinload(Project.expenses),
+        selectinload(Project.inventory_items),
+        selectinload(Project.tasks).selectinload(Task.worker).selectinload(Worker.user),
+        selectinload(Project.team).options(
+            selectinload(Worker.user),
+            selectinload(Worker.skills),
+            selectinload(Worker.projects),
+            selectinload(Worker.tasks),
+        ),
+    )
+
+
+def get_projects_details(session: Session, project_ids: list[int]) -> list[ProjectOut]:
+    """
+    Construye los ProjectOut de varios proyectos con un número fijo de consultas,
+    independiente del número de proyectos, gastos o miembros del equipo.
+    """
+    if not project_ids:
+        return []
+
+    projects = session.exec(
+        select(Project)
+        .where(Project.id.in_(project_ids))
+        .options(*_project_out_options())
+        .order_by(Project.id)
+    ).all()
+
+    # Todos los links de gastos de los proyectos en una sola consulta
+    links_map = get_expense_links(session=session, project_ids=project_ids)
+
+    figures = get_projects_summary(session=session, project_ids=project_ids)
+
+    return [project_to_out(project=project, links_map=links_map, figures=figures[project.id])
+            for project in projects]
+
+
+# Claves de progreso que espera el frontend para cada estado de tarea
+PROGRESS_KEYS = {
+    TaskStatus.DONE: "done",
+    TaskStatus.IN_PROGRESS: "inProgress",
+    TaskStatus.TODO: "todo",
+}
+
+
+def get_projects_summary(session: Session, project_ids: list[int]) -> Dict[int, ProjectFigures]:
+    """
+    Calcula currentSpent, expenseCategories y progress de varios proyectos con
+    dos consultas agregadas (GROUP BY), sin cargar los gastos ni las tareas.
+    """
+    figures = {project_id: ProjectFigures() for project_id in project_ids}
+    if not project_ids:
+        return figures
+
+    # Gastos agrupados por proyecto, categoría y estado
+    expense_rows = session.exec(
+        select(ProjectExpenseLink.project_id, Expense.category, Expense.status, func.sum(Expense.amount))
+        .join(Expense, Expense.id == ProjectExpenseLink.expense_id)
+        .where(ProjectExpenseLink.project_id.in_(project_ids))
+        .group_by(ProjectExpenseLink.project_id, Expense.category, Expense.status)
+    ).all()
+
+    for project_id, category, expense_status, amount in expense_rows:
+        project_figures = figures[project_id]
+        categories = project_figures.expenseCategories
+        categories[category] = categories.get(category, 0) + amount
+        if expense_status == ExpenseStatus.APPROVED:
+            project_figures.currentSpent += amount
+
+    # Tareas contadas por proyecto y estado
+    task_rows = session.exec(
+        select(Task.project_id, Task.status, func.count(Task.id))
+        .where(Task.project_id.in_(project_ids))
+        .group_by(Task.project_id, Task.status)
+    ).all()
+
+    for project_id, task_status, count in task_rows:
+        figures[project_id].progress[PROGRESS_KEYS[task_status]] = count
+
+    return figures
 
 
 def get_project_details(session: Session, project_id: int) -> ProjectOut:
-    project = get_project_id(session=session, project_id=project_id)
-    if not project:
+    projects = get_projects_details(session=session, project_ids=[project_id])
+    if not projects:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    print(f"------------!!!!!!!!!!Project {project.id} found, fetching details")
-    current_spent = sum(exp.amount for exp in project.expenses if exp.status == ExpenseStatus.APPROVED)
-
-    done_count = sum(1 for t in project.tasks if t.status == TaskStatus.DONE)
-    in_progress_count = sum(1 for t in project.tasks if t.status == TaskStatus.IN_PROGRESS)
-    todo_count = sum(1 for t in project.tasks if t.status == TaskStatus.TODO)
-    progress = {
-        "done": done_count,
-        "inProgress": in_progress_count,
-        "todo": todo_count,
-    }
-
-    expense_categories: Dict[str, float] = {}
-    for exp in project.expenses:
-        expense_categories[exp.category] = expense_categories.get(exp.category, 0) + exp.amount
-
-    expenses_out = [expense_to_out(expense=exp,
-                                   link=session.exec(select( ProjectExpenseLink)
-                                                     .where(ProjectExpenseLink.project_id == project.id).
-                                                     where(ProjectExpenseLink.expense_id == exp.id)).first())
+    logger.debug("Project %s found, fetching details", project_id)
+    return projects[0]
+
+
+async def get_project_details_async(session: AsyncSession, project_id: int) -> ProjectOut:
+    """Variante asíncrona de get_project_details."""
+    return await session.run_sync(
+        lambda sync_session: get_project_details(session=sync_session, project_id=project_id)
+    )
+
+
+def project_to_out(project: Project, links_map: Dict[tuple, ProjectExpenseLink],
+                   figures: ProjectFigures) -> ProjectOut:
+    """Convierte un Project con sus relaciones ya cargadas en ProjectOut."""
+    expenses_out = [expense_to_out(expense=exp, link=links_map.get((project.id, exp.id)))
                     for exp in project.expenses]
 
     admin_name = "Unknown"
@@ -363,8 +540,8 @@ def get_project_details(session: Session, project_id: int) -> ProjectOut:
 
     return ProjectOut(
         id=project.id, title=project.title, description=project.description, inventory=project.inventory_items,
-        admin=admin_name, limit_budget=project.limit_budget, currentSpent=current_spent,
-        progress=progress, location=project.location, start_date=project.start_date, end_date=project.end_date,
-        status=project.status, expenses=expenses_out, expenseCategories=expense_categories,
+        admin=admin_name, limit_budget=project.limit_budget, currentSpent=figures.currentSpent,
+        progress=figures.progress, location=project.location, start_date=project.start_date, end_date=project.end_date,
+        status=project.status, expenses=expenses_out, expenseCategories=figures.expenseCategories,
         clients=clients_out, tasks=[task_to_out(t) for t in project.tasks], team=[WorkerRead.from_worker(w) for w in project.team]
     )
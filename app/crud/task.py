@@ -1,11 +1,13 @@
 """ TASK related CRUD methods """
 from datetime import datetime, timezone
+from typing import Dict
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, delete, update
 
+from app.models.activity import Activity
 from app.models.project import Project
 from app.models.task import TaskCreate, TaskOut, Task, task_to_out, TaskUpdate, TaskBackend
 from app.models.user import UserRole, Worker, Admin
@@ -82,15 +84,18 @@ def create_task_for_project(
     )
 
     session.add(new_task)
-    session.commit()
-    session.refresh(new_task)
+    session.flush()
 
+    # La actividad se guarda en la misma transacción que la tarea
     send_task_notifications(
         session=session,
         task=new_task,
         worker_name= worker.user.name,
-        project_id=project_id
+        project_id=project_id,
+        title_project=project.title
     )
+    session.commit()
+    session.refresh(new_task)
 
     return task_to_out(new_task)
 
@@ -114,7 +119,7 @@ def update_existing_task(
 ) -> TaskOut:
     """Actualiza una tarea existente con validación de proyecto"""
     # Obtener la tarea
-    query = select(Task).where(Task.id == task_id)
+    query = select(Task).where(Task.id == task_id).options(joinedload(Task.project))
     if project_id:
         query = query.where(Task.project_id == project_id)
 
@@ -150,58 +155,166 @@ def update_existing_task(
 
     task.updated_at = datetime.now(timezone.utc)
     session.add(task)
-    session.commit()
-    session.refresh(task)
     
     # Notificar cambios relevantes
     if update_data:  # Solo si hubo cambios reales
         notify_task_update(
             session=session,
             task=task,
+            title_project=task.project.title,
             update_data={
                 k: {"old": getattr(original_task, k), "new": v}
                 for k, v in update_data.items()
                 if getattr(original_task, k) != v
             }
         )
+    session.commit()
+    session.refresh(task)
 
     return task_to_out(task)
 
 
-def update_tasks_in_project(
+def validate_task_changes(
         session: Session,
         project_id: int,
         tasks_data: list[TaskBackend],
+        team_ids: set[int]
+) -> Dict[int, Task]:
+    """
+    Valida todos los cambios de tareas de un ProjectUpdate antes de escribir nada.
+    `team_ids` es el equipo del proyecto ya con los cambios de equipo aplicados.
+    Devuelve las tareas existentes afectadas (actualizadas o eliminadas) por id.
+    """
+    created = [task_data for task_data in tasks_data if not task_data.updated and task_data.created]
+    existing_ids = {task_data.id for task_data in tasks_data if task_data.updated or not task_data.created}
+
+    tasks = {
+        task.id: task for task in session.exec(
+            select(Task)
+            .where(Task.project_id == project_id, Task.id.in_(existing_ids))
+        ).all()
+    } if existing_ids else {}
+    missing = existing_ids - set(tasks)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tasks not found in project {project_id}: {sorted(missing)}"
+        )
+
+    # Títulos únicos dentro del proyecto, también entre las tareas nuevas
+    titles = set(session.exec(select(Task.title).where(Task.project_id == project_id)).all())
+    for task_data in created:
+        if task_data.title in titles:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Task with this title already exists in this project"
+            )
+        titles.add(task_data.title)
+
+    # Workers asignados: deben existir con rol WORKER (se cargan con su usuario para las notificaciones)
+    worker_ids = {task_data.worker_id for task_data in tasks_data
+                  if (task_data.updated or task_data.created) and task_data.worker_id is not None}
+    workers = {
+        worker.id: worker for worker in session.exec(
+            select(Worker)
+            .where(Worker.id.in_(worker_ids))
+            .options(selectinload(Worker.user))
+        ).all()
+    } if worker_ids else {}
+
+    now = datetime.now(timezone.utc)
+    for task_data in tasks_data:
+        if not (task_data.updated or task_data.created):
+            continue
+        if task_data.worker_id is not None:
+            worker = workers.get(task_data.worker_id)
+            if not worker or worker.user.role != UserRole.WORKER:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid worker ID"
+                )
+        if task_data.due_date and task_data.due_date.replace(tzinfo=task_data.due_date.tzinfo or timezone.utc) < now:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Due date cannot be in the past"
+            )
+
+    for task_data in created:
+        if task_data.worker_id not in team_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Worker is not part of the project team"
+            )
+
+    return tasks
+
+
+def apply_task_changes(
+        session: Session,
+        project: Project,
+        tasks_data: list[TaskBackend],
+        tasks: Dict[int, Task],
         admin_id: int
 ):
-    """Actualiza múltiples tareas en un proyecto"""
+    """
+    Aplica los cambios de tareas ya validados sin hacer commit: actualizaciones sobre
+    las tareas cargadas, un INSERT por lotes y un único DELETE. Debe ejecutarse dentro
+    de activity_batch() para que las actividades también se inserten juntas.
+    """
+    now = datetime.now(timezone.utc)
+    changes = {}
+    new_tasks = []
+    deleted_ids = []
     for task_data in tasks_data:
-        # Revisar Booleanos que indican si es una actualización o creación
         if task_data.updated:
-            # Actualizar tarea existente
-             update_existing_task(
-                session=session,
-                task_id=task_data.id,
-                task_data=TaskUpdate.model_validate(task_data),
-                project_id=project_id
-            )
+            task = tasks[task_data.id]
+            update_data = task_data.model_dump(exclude_unset=True, include=set(TaskUpdate.model_fields))
+            changes[task.id] = {
+                k: {"old": getattr(task, k), "new": v}
+                for k, v in update_data.items()
+                if getattr(task, k) != v
+            }
+            for key, value in update_data.items():
+                setattr(task, key, value)
+            task.updated_at = now
         elif task_data.created:
-            # Crear nueva tarea
-             create_task_for_project(
-                session=session,
-                project_id=project_id,
-                task_data=TaskCreate.model_validate(task_data),
+            new_tasks.append(Task(
+                **TaskCreate.model_validate(task_data).model_dump(exclude_unset=True),
+                project_id=project.id,
                 admin_id=admin_id
-            )
+            ))
         else:
-            # Eliminar tarea existente
-            delete_project_task(
-                session=session,
-                project_id=project_id,
-                task_id=task_data.id
-            )
+            deleted_ids.append(task_data.id)
 
+    session.add_all(new_tasks)
+    session.flush()
 
+    for task_id, task_changes in changes.items():
+        if task_changes:
+            notify_task_update(
+                session=session, task=tasks[task_id], title_project=project.title, update_data=task_changes
+            )
+    for task in new_tasks:
+        send_task_notifications(
+            session=session,
+            task=task,
+            worker_name=task.worker.user.name,
+            project_id=project.id,
+            title_project=project.title
+        )
+
+    if deleted_ids:
+        for task_id in deleted_ids:
+            task = tasks[task_id]
+            notify_task_deletion(
+                session=session,
+                project_id=project.id,
+                title_project=project.title,
+                task_data={"id": task.id, "title": task.title, "description": task.description, "status": task.status}
+            )
+        # Las actividades anteriores conservan el historial pero dejan de apuntar a la tarea
+        session.exec(update(Activity).where(Activity.task_id.in_(deleted_ids)).values(task_id=None))
+        session.exec(delete(Task).where(Task.id.in_(deleted_ids)))
 
 
 def delete_project_task(
@@ -215,7 +328,8 @@ def delete_project_task(
         .where(Task.id == task_id)
         .where(Task.project_id == project_id)
         .options(
-            selectinload(Task.worker)  # Carga el worker relacionado
+            selectinload(Task.worker),  # Carga el worker relacionado
+            joinedload(Task.project)
         )
     ).first()
 
@@ -233,11 +347,12 @@ def delete_project_task(
     }
     
     session.delete(task)
-    session.commit()
     
     # Notificar eliminación
     notify_task_deletion(
         session=session,
         project_id=project_id,
+        title_project=task.project.title,
         task_data=task_data
-    )
\ No newline at end of file
+    )
+    session.commit()
\ No newline at end of file
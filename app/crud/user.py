@@ -1,17 +1,21 @@
 """ User related CRUD methods """
+import logging
+
 from fastapi import HTTPException, status
 from typing import Any, List
 
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import or_
 
+from app.core.cache import invalidate_principal
 from app.core.security import get_password_hash
 from app.crud.follow import get_workers_follows
 from app.models.user import User, UserUpdate, UserOut, UserRegister, UserRole, Admin, Client, Worker, \
     ClientAvailability, ClientOut, AdminOut, WorkerOut, WorkerRead, WorkerSkill, ClientAvailabilityOut
 
-crud_id = "---------------------[User CRUD]"
+logger = logging.getLogger(__name__)
 
 def create_user(*, session: Session, user_data: UserRegister) -> UserOut:
     # Usar or_ para combinar condiciones
@@ -21,11 +25,8 @@ def create_user(*, session: Session, user_data: UserRegister) -> UserOut:
         )
     ).first()
 
-    print(f"{crud_id} Verifying if user already exists...")
-    print(f"{crud_id} Existing user: ", existing_user)
     if existing_user:
-        print("[User CRUD] => User already exists.")
-        print("[User CRUD] => User is deleted: ", existing_user.is_deleted)
+        logger.debug("User %s already exists (deleted: %s)", existing_user.id, existing_user.is_deleted)
         if existing_user.is_deleted:
             existing_user.is_deleted = False
             existing_user.password = get_password_hash(user_data.password)
@@ -53,7 +54,7 @@ def create_user(*, session: Session, user_data: UserRegister) -> UserOut:
         session.add(Client(user_id=new_user.id))
     elif new_user.role == UserRole.WORKER:
         session.add(Worker(user_id=new_user.id))
-        print(f"{crud_id} Worker created- User ID: ", new_user.id)
+        logger.debug("Worker created for user %s", new_user.id)
 
     session.commit()
 
@@ -66,7 +67,7 @@ def create_user(*, session: Session, user_data: UserRegister) -> UserOut:
 
 def get_user_client(*, session: Session, user_id: int) -> ClientOut | None:
     user = session.get(User, user_id)
-    print(f"{crud_id} Getting user client for user ID: {user_id}")
+    logger.debug("Getting user client for user %s", user_id)
     try:
         if user:
             client = session.exec(select(Client).where(Client.user_id == user.id, Client.is_deleted == False)).first()
@@ -79,6 +80,11 @@ def get_user_client(*, session: Session, user_id: int) -> ClientOut | None:
     return None
 
 
+async def get_user_client_async(*, session: AsyncSession, user_id: int) -> ClientOut | None:
+    """Variante asíncrona de get_user_client."""
+    return await session.run_sync(lambda sync_session: get_user_client(session=sync_session, user_id=user_id))
+
+
 def get_user_admin(*, session: Session, user_id: int) -> AdminOut | None:
     user = session.get(User, user_id)
     if user:
@@ -90,7 +96,7 @@ def get_user_admin(*, session: Session, user_id: int) -> AdminOut | None:
 
 def get_user_worker(*, session: Session, user_id: int) -> WorkerRead | None:
     user = session.get(User, user_id)
-    print(f"{crud_id} Getting user worker for user ID: {user_id}")
+    logger.debug("Getting user worker for user %s", user_id)
     if user:
         worker = session.exec(
             select(Worker)
@@ -236,6 +242,7 @@ def update_user(*, session: Session, user_id: int, user: UserUpdate) -> UserOut:
         # 7. Confirmar cambios
         session.commit()
         session.refresh(db_user)
+        invalidate_principal(user_id)
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -317,6 +324,7 @@ def delete_user(*, session: Session, user_id: int) -> Any:
     if user:
         session.delete(user)
         session.commit()
+        invalidate_principal(user_id)
         return user
     return None
 
@@ -326,6 +334,19 @@ def get_user(*, session: Session, user_id: int) -> UserOut:
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
 
+    return user_to_out(user)
+
+
+async def get_user_async(*, session: AsyncSession, user_id: int) -> UserOut:
+    """Variante asíncrona de get_user."""
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
+
+    return user_to_out(user)
+
+
+def user_to_out(user: User) -> UserOut:
     return UserOut(
         id=user.id, name=user.name, username=user.username, location=user.location, 
         description=user.description, email=user.email, role=user.role, phone=user.phone, 
@@ -338,6 +359,11 @@ def get_user_in_db(*, session: Session, user_id: int) -> User | None:
     return user
 
 
+async def get_user_in_db_async(*, session: AsyncSession, user_id: int) -> User | None:
+    """Variante asíncrona de get_user_in_db."""
+    return await session.get(User, user_id)
+
+
 def get_user_by_username(*, session: Session, username: str) -> Any:
     user = session.exec(select(User).where(User.username == username)).first()
     return user
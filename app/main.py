@@ -1,22 +1,21 @@
+import asyncio
+
 from .core.database import engine
 from sqlmodel import SQLModel
 from .api.main import api_router
+from .api.routes.monitoring import get_metrics
 from .core.config import settings
+from .core.logs import setup_logging
+from .core.metrics import MetricsMiddleware
+from .crud.notification import run_activity_outbox
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 import logging
 
-# Set up logging to a file
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()  # Optional: also log to console
-    ]
-)
+# Logging no bloqueante: las peticiones solo encolan, un hilo escribe en consola y en LOG_FILE
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -39,4 +38,27 @@ def on_startup():
 
 app.add_event_handler("startup", on_startup)
 
+
+# Drainer del outbox de actividades, solo si el reparto es asíncrono
+async def start_activity_outbox():
+    if settings.ACTIVITY_OUTBOX_ASYNC:
+        app.state.activity_outbox = asyncio.create_task(
+            run_activity_outbox(settings.ACTIVITY_OUTBOX_INTERVAL, settings.ACTIVITY_OUTBOX_BATCH_SIZE)
+        )
+
+
+async def stop_activity_outbox():
+    task = getattr(app.state, "activity_outbox", None)
+    if task is not None:
+        task.cancel()
+
+
+app.add_event_handler("startup", start_activity_outbox)
+app.add_event_handler("shutdown", stop_activity_outbox)
+
 app.include_router(api_router)
+
+# Métricas por plantilla de ruta; se añade el último para medir también el resto de middlewares
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+    app.add_api_route("/metrics", get_metrics, include_in_schema=False)
@@ -1,7 +1,13 @@
-from typing import Any, Dict
-from sqlalchemy import JSON
-from sqlmodel import Session
+from contextlib import contextmanager
+from typing import Any, Dict, Set, Tuple
+from sqlalchemy import JSON, Index, update
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import insert_or_increment
+from app.core.events import publish_on_commit
 from app.models.project import Project
+from app.models.project_client import ProjectClient
+from app.models.user import Admin, Client, UserRole
 from .deps import SQLModel, datetime, timezone, Field, Relationship, Enum, Optional, List
 
 class ActivityType(str, Enum):
@@ -19,7 +25,22 @@ class ActivityType(str, Enum):
     # Se pueden añadir más tipos según crezca la app
 
 
+# Actividades de gastos, que no se muestran a los clientes
+EXPENSE_ACTIVITY_TYPES = {
+    ActivityType.EXPENSE_ADDED,
+    ActivityType.EXPENSE_APPROVED,
+    ActivityType.EXPENSE_UPDATED,
+    ActivityType.EXPENSE_DELETED,
+}
+
+
 class Activity(SQLModel, table=True):
+    # Feed de notificaciones: actividades de un proyecto ordenadas por fecha
+    __table_args__ = (
+        Index("ix_activity_project_id_created_at", "project_id", "created_at"),
+        Index("ix_activity_dispatched_id", "dispatched", "id"),  # Pendientes del outbox
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="project.id")
     
@@ -29,7 +50,8 @@ class Activity(SQLModel, table=True):
     
     activity_type: ActivityType
     title_project: str = Field(default="")
-    is_read: bool = Field(default=False)
+    is_read: bool = Field(default=False)  # Obsoleto: el estado de lectura es por usuario (ActivityRead)
+    dispatched: bool = Field(default=False)  # Contadores y stream ya notificados (outbox)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     metadatas: Optional[Dict[str, Any]] = Field(default={}, sa_type=JSON)  # Datos adicionales
 
@@ -52,6 +74,47 @@ class Activity(SQLModel, table=True):
     )
 
 
+class ActivityRead(SQLModel, table=True):
+    """Actividad leída por un usuario concreto"""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    activity_id: int = Field(foreign_key="activity.id", primary_key=True)
+    read_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ActivityUnreadCounter(SQLModel, table=True):
+    """Número de actividades sin leer por usuario y proyecto, mantenido al registrar y leer actividades"""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    unread_count: int = Field(default=0)
+
+
+class UnreadCountOut(SQLModel):
+    total: int = 0
+    projects: Dict[int, int] = Field(default_factory=dict)  # project_id -> no leídas
+
+
+class ActivityEvent(SQLModel):
+    """Actividad enviada por /notifications/stream; solo columnas propias, sin cargar relaciones."""
+    id: int
+    project_id: int
+    activity_type: ActivityType
+    title_project: str
+    created_at: datetime
+    task_id: Optional[int] = None
+    expense_id: Optional[int] = None
+    inventory_item_id: Optional[int] = None
+    metadatas: Dict[str, Any] = Field(default={})
+
+    @classmethod
+    def from_activity(cls, activity: Activity) -> "ActivityEvent":
+        return cls.model_validate(activity, from_attributes=True)
+
+
+class MarkAllReadOut(SQLModel):
+    updated: int  # Actividades marcadas como leídas
+    read_until: datetime  # Las actividades posteriores siguen sin leer
+
+
 class BasicInfo(SQLModel):
     id: int
     title: str
@@ -75,12 +138,12 @@ class ActivityOut(SQLModel):
     class Config:
         from_attributes = True
     @classmethod
-    def from_activity(cls, activity: Activity):
+    def from_activity(cls, activity: Activity, is_read: bool = False):
         return cls(
             id=activity.id,
             activity_type=activity.activity_type,
             title_project=activity.title_project,
-            is_read=activity.is_read,
+            is_read=is_read,
             created_at=activity.created_at,
             project=BasicInfo.from_orm(activity.project),
             task=BasicInfo.from_orm(activity.task) if activity.task else None,
@@ -93,7 +156,35 @@ class ActivityOut(SQLModel):
         )
 
 
+ACTIVITY_BATCH_KEY = "activity_batch"
+
+
+@contextmanager
+def activity_batch(session: Session):
+    """
+    Agrupa las actividades registradas dentro del bloque: se insertan con un único
+    flush y los contadores de no leídas se actualizan una vez por proyecto.
+    """
+    session.info[ACTIVITY_BATCH_KEY] = []
+    try:
+        yield
+    except BaseException:
+        session.info.pop(ACTIVITY_BATCH_KEY, None)
+        raise
+    activities = session.info.pop(ACTIVITY_BATCH_KEY)
+    pending = [activity for activity in activities if activity.dispatched]
+    if not pending:
+        return
+
+    session.flush()
+    ActivityService(session).dispatch_all(pending)
+
+
 class ActivityService:
+    """
+    Registra actividades dentro de la transacción del cambio que las origina: no
+    hace commit, lo hace el CRUD que la llama junto con el resto de sus cambios.
+    """
     def __init__(self, session: Session):
         self.session = session
     
@@ -101,34 +192,158 @@ class ActivityService:
         self,
         activity_type: ActivityType,
         project_id: int,
+        title_project: str,
         task_id: Optional[int] = None,
         expense_id: Optional[int] = None,
         inventory_item_id: Optional[int] = None,
         metadatas: Optional[dict] = None
     ) -> Activity:
-        project = self.session.get(Project, project_id)
-        if not project:
-            raise ValueError("Project not found")
-
-        print("-------------------!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!TASK ID:", task_id)
-        
         activity = Activity(
             project_id=project_id,
             task_id=task_id,
             expense_id=expense_id,
             inventory_item_id=inventory_item_id,
             activity_type=activity_type,
-            title_project=project.title,
-            metadatas=metadatas or {}
+            title_project=title_project,
+            metadatas=metadatas or {},
+            # Con el outbox asíncrono el reparto (contadores y stream) lo hace el drainer
+            dispatched=not settings.ACTIVITY_OUTBOX_ASYNC
         )
         
         self.session.add(activity)
-        self.session.commit()
+        batch = self.session.info.get(ACTIVITY_BATCH_KEY)
+        if batch is not None:
+            # Dentro de activity_batch(): se insertan y reparten todas juntas al final
+            batch.append(activity)
+        elif activity.dispatched:
+            self.session.flush()  # Asigna el id que se envía a /notifications/stream
+            self.dispatch(project_id, [activity])
         return activity
 
+    def dispatch(self, project_id: int, activities: List[Activity], read: Set[Tuple[int, int]] = frozenset()):
+        """
+        Reparto de actividades ya insertadas de un proyecto: contadores de no leídas y stream.
+        `read` son los pares (user_id, activity_id) ya leídos, que no se suman al contador.
+        """
+        self.increment_unread(project_id, activities, read)
+        for activity in activities:
+            publish_on_commit(self.session, project_id, ActivityEvent.from_activity(activity))
+
+    def dispatch_all(self, activities: List[Activity], read: Set[Tuple[int, int]] = frozenset()):
+        """Reparte actividades de varios proyectos, agrupadas por proyecto."""
+        by_project: Dict[int, List[Activity]] = {}
+        for activity in activities:
+            by_project.setdefault(activity.project_id, []).append(activity)
+        for project_id, project_activities in by_project.items():
+            self.dispatch(project_id, project_activities, read)
+
+    def dispatch_pending(self, batch_size: int) -> int:
+        """Drena el outbox: reparte las actividades pendientes más antiguas y hace commit."""
+        activities = self.session.exec(
+            select(Activity)
+            .where(Activity.dispatched == False)
+            .order_by(Activity.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)  # Varios procesos pueden drenar a la vez
+        ).all()
+
+        # Con el outbox asíncrono un usuario puede leer la actividad antes de que se reparta:
+        # mark_activity_as_read no la descontó, así que tampoco se le suma ahora
+        read = set(self.session.exec(
+            select(ActivityRead.user_id, ActivityRead.activity_id)
+            .where(ActivityRead.activity_id.in_([activity.id for activity in activities]))
+        ).all()) if activities else set()
+
+        self.dispatch_all(activities, read)
+        if activities:
+            self.session.exec(
+                update(Activity)
+                .where(Activity.id.in_([activity.id for activity in activities]))
+                .values(dispatched=True)
+            )
+        self.session.commit()
+        return len(activities)
+
+    def unread_increments(
+        self,
+        project_id: int,
+        activities: List[Activity],
+        read: Set[Tuple[int, int]] = frozenset()
+    ) -> Dict[int, int]:
+        """
+        Actividades nuevas que ve cada destinatario: el admin del proyecto todas
+        y sus clientes todas salvo las de gastos, sin contar las que ya ha leído.
+        """
+        rows = self.session.exec(
+            select(Admin.user_id, Client.user_id)
+            .join(Project, Project.admin_id == Admin.id)
+            .outerjoin(ProjectClient, ProjectClient.project_id == Project.id)
+            .outerjoin(Client, Client.id == ProjectClient.client_id)
+            .where(Project.id == project_id)
+        ).all()
+
+        increments = {}
+        for admin_user_id, client_user_id in rows:
+            increments[admin_user_id] = sum(
+                (admin_user_id, activity.id) not in read for activity in activities
+            )
+            if client_user_id is not None:
+                increments[client_user_id] = sum(
+                    activity.activity_type not in EXPENSE_ACTIVITY_TYPES and (client_user_id, activity.id) not in read
+                    for activity in activities
+                )
+        return {user_id: amount for user_id, amount in increments.items() if amount}
+
+    def recipient_role(self, project_id: int, user_id: int) -> Optional[UserRole]:
+        """Rol con el que el usuario recibe las actividades del proyecto, o None si no las recibe."""
+        if self.session.exec(
+            select(Project.id)
+            .join(Admin, Admin.id == Project.admin_id)
+            .where(Project.id == project_id, Admin.user_id == user_id)
+        ).first():
+            return UserRole.ADMIN
+        if self.session.exec(
+            select(ProjectClient.project_id)
+            .join(Client, Client.id == ProjectClient.client_id)
+            .where(ProjectClient.project_id == project_id, Client.user_id == user_id)
+        ).first():
+            return UserRole.CLIENT
+        return None
+
+    def receives(self, activity: Activity, user_id: int) -> bool:
+        """Mismas reglas que unread_increments para una actividad y un usuario concretos."""
+        role = self.recipient_role(activity.project_id, user_id)
+        if role == UserRole.CLIENT:
+            return activity.activity_type not in EXPENSE_ACTIVITY_TYPES
+        return role == UserRole.ADMIN
+
+    def increment_unread(
+        self,
+        project_id: int,
+        activities: List[Activity],
+        read: Set[Tuple[int, int]] = frozenset()
+    ):
+        """Suma las nuevas actividades al contador de no leídas de cada destinatario."""
+        increments = self.unread_increments(project_id, activities, read)
+        if not increments:
+            return
+
+        # Un único INSERT ... ON DUPLICATE KEY UPDATE: crea el contador en el primer aviso del
+        # proyecto sin chocar con otra transacción que lo esté creando a la vez
+        insert_or_increment(
+            self.session,
+            ActivityUnreadCounter,
+            [
+                {"user_id": user_id, "project_id": project_id, "unread_count": amount}
+                for user_id, amount in increments.items()
+            ],
+            column="unread_count"
+        )
+
 
 class ActivityOutList(SQLModel):
     activities: List[ActivityOut] = Field(default_factory=list)
+    next_cursor: Optional[str] = None  # None cuando no hay más páginas
 
     class Config:
         from_attributes = True
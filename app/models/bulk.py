@@ -0,0 +1,32 @@
+from typing import List
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+
+
+class ImportRowError(BaseModel):
+    row: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    """Resultado de una importación masiva: filas insertadas, actualizadas y rechazadas."""
+    imported: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+    def add_error(self, row: int, error: Exception):
+        self.failed += 1
+        # Solo se detallan los primeros errores para acotar el tamaño de la respuesta
+        if len(self.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            self.errors.append(ImportRowError(row=row, message=format_row_error(error)))
+
+
+def format_row_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+        )
+    return str(error)
@@ -21,7 +21,7 @@ class ExpenseCategory(str, Enum):
 class Expense(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(..., max_length=40, description="Title of the expense")
-    project_id: int = Field(foreign_key="project.id")
+    project_id: int = Field(foreign_key="project.id", index=True)
     expense_date: datetime = Field(alias="date")
     category: ExpenseCategory
     description: str
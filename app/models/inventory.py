@@ -1,6 +1,7 @@
 from typing import List
 
 from pydantic import model_validator
+from sqlalchemy import Index
 
 from .deps import Field, Relationship, SQLModel, Enum, Optional
 
@@ -16,6 +17,9 @@ class InventoryStatus(str, Enum):
     IN_BUDGET = "In_Budget"
 
 class InventoryItem(SQLModel, table=True):
+    # Búsqueda de items por nombre dentro de un proyecto
+    __table_args__ = (Index("ix_inventoryitem_project_id_name", "project_id", "name"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(..., max_length=100)
     category: InventoryCategory
@@ -18,6 +18,11 @@ class ProjectStatus(str, Enum):
     INACTIVE = "Inactive"
 
 
+class ProjectView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
 class Project(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
@@ -97,6 +102,13 @@ def team_member_to_out(member: Worker) -> TeamMemberOut:
         avatar_url=None
     )
 
+class ProjectFigures(SQLModel):
+    """Cifras agregadas de un proyecto, calculadas en la base de datos."""
+    currentSpent: float = 0
+    expenseCategories: Dict[str, float] = Field(default_factory=dict)
+    progress: Dict[str, int] = Field(default_factory=lambda: {"done": 0, "inProgress": 0, "todo": 0})
+
+
 class ProjectOut(BaseModel):
     id: int
     title: str
@@ -118,3 +130,18 @@ class ProjectOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ProjectSummaryOut(BaseModel):
+    """Versión ligera de ProjectOut para el listado de proyectos."""
+    id: int
+    title: str
+    status: ProjectStatus
+    limit_budget: float
+    currentSpent: float
+    progress: Dict[str, int]
+
+
+class ProjectSummaryPage(BaseModel):
+    projects: List[ProjectSummaryOut] = []
+    next_cursor: Optional[int] = None  # id del último proyecto devuelto, None si no hay más
@@ -4,5 +4,5 @@ from .deps import datetime, Field, SQLModel, timezone
 
 class ProjectClient(SQLModel, table=True):
     project_id: int = Field(foreign_key="project.id", primary_key=True)
-    client_id: int = Field(foreign_key="client.id", primary_key=True)
+    client_id: int = Field(foreign_key="client.id", primary_key=True, index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
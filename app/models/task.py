@@ -12,7 +12,7 @@ class TaskStatus(str, Enum):
 
 class Task(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    project_id: int = Field(foreign_key="project.id")
+    project_id: int = Field(foreign_key="project.id", index=True)
     admin_id: int = Field(foreign_key="admin.id")
     worker_id: int = Field(foreign_key="worker.id")
     title: str
@@ -2,6 +2,7 @@
 from .deps import datetime, Field, Relationship, SQLModel, Enum, Optional, List, timezone
 from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy import Index
 
 from .project_team import ProjectTeamLink
 from .project_client import ProjectClient
@@ -97,6 +98,9 @@ class UserUpdate(SQLModel):
 
 
 class Follow(SQLModel, table=True):
+    # Seguidores / solicitudes de un usuario filtradas por estado
+    __table_args__ = (Index("ix_follow_following_id_status", "following_id", "status"),)
+
     follower_id: int = Field(foreign_key="user.id", primary_key=True)
     following_id: int = Field(foreign_key="user.id", primary_key=True)
     status: FollowStatus = Field(default=FollowStatus.PENDING, index=True)
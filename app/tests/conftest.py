@@ -0,0 +1,135 @@
+"""
+Aplicación completa sobre un SQLite temporal: fixtures compartidas por los tests de rutas.
+Los tokens se firman directamente con create_access_token para no pagar bcrypt en cada test.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import principal_cache
+from app.core.database import get_async_session, get_session
+from app.core.security import create_access_token
+from app.main import app
+from app.models.expense import Expense
+from app.models.inventory import InventoryItem
+from app.models.project import Project
+from app.models.project_client import ProjectClient
+from app.models.project_expense import ProjectExpenseLink
+from app.models.project_team import ProjectTeamLink
+from app.models.task import Task
+from app.models.user import Admin, Client, User, UserRole, Worker
+
+
+@dataclass
+class ProjectWorld:
+    """Ids de un proyecto con su admin, un cliente, un cliente ajeno y dos workers (uno en el equipo)."""
+    admin_user_id: int
+    client_user_id: int
+    outsider_user_id: int
+    team_worker_id: int
+    free_worker_id: int
+    project_id: int
+    task_id: int
+    expense_id: int
+    item_id: int
+
+
+def bearer(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Fichero en disco: los engines síncrono y asíncrono abren la misma base de datos
+    return tmp_path / "app.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def api(engine, db_path):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    async def override_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_async_session] = override_async_session
+    principal_cache.clear()  # Cada test tiene su propia base de datos con los mismos ids
+    # Sin `with`: no se ejecuta el startup, que crearía las tablas en la base de datos configurada
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    principal_cache.clear()
+
+
+@pytest.fixture
+def world(engine) -> ProjectWorld:
+    with Session(engine) as session:
+        def user(username: str, role: UserRole, phone: str) -> User:
+            return User(name=username.title(), username=username, email=f"{username}@test", password="x",
+                        role=role, phone=phone)
+
+        admin_user = user("admin", UserRole.ADMIN, "600000000")
+        client_user = user("client", UserRole.CLIENT, "600000001")
+        outsider_user = user("outsider", UserRole.CLIENT, "600000002")
+        team_user = user("worker", UserRole.WORKER, "600000003")
+        free_user = user("freelance", UserRole.WORKER, "600000004")
+        session.add_all([admin_user, client_user, outsider_user, team_user, free_user])
+        session.flush()
+
+        admin = Admin(user_id=admin_user.id)
+        client = Client(user_id=client_user.id)
+        team_worker = Worker(user_id=team_user.id, specialty="Paleta")
+        free_worker = Worker(user_id=free_user.id, specialty="Pintor")
+        session.add_all([admin, client, Client(user_id=outsider_user.id), team_worker, free_worker])
+        session.flush()
+
+        start = datetime(2025, 1, 1)
+        project = Project(title="Reforma cocina", description="Reforma integral", admin_id=admin.id,
+                          limit_budget=10_000, location="Barcelona", start_date=start,
+                          end_date=start + timedelta(days=90))
+        session.add(project)
+        session.flush()
+
+        task = Task(project_id=project.id, admin_id=admin.id, worker_id=team_worker.id, title="Derribo",
+                    status="todo")
+        expense = Expense(title="Cemento", project_id=project.id, expense_date=start, category="Materials",
+                          description="Sacos", amount=120, status="Pending")
+        item = InventoryItem(name="Azulejo", category="Materials", total=50, unit="m2", unit_cost=12,
+                             supplier="Proveedor", status="In_Budget", project_id=project.id)
+        session.add_all([
+            ProjectClient(project_id=project.id, client_id=client.id),
+            ProjectTeamLink(project_id=project.id, worker_id=team_worker.id, role="Paleta"),
+            task, expense, item
+        ])
+        session.flush()
+        session.add(ProjectExpenseLink(project_id=project.id, expense_id=expense.id))
+        session.commit()
+
+        return ProjectWorld(
+            admin_user_id=admin_user.id,
+            client_user_id=client_user.id,
+            outsider_user_id=outsider_user.id,
+            team_worker_id=team_worker.id,
+            free_worker_id=free_worker.id,
+            project_id=project.id,
+            task_id=task.id,
+            expense_id=expense.id,
+            item_id=item.id,
+        )
@@ -0,0 +1,85 @@
+"""Exportación en streaming de gastos e inventario (CSV y NDJSON) sobre la base de datos de la petición."""
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session
+
+from app.crud.expense import EXPENSE_EXPORT_COLUMNS
+from app.crud.inventory import INVENTORY_EXPORT_COLUMNS
+from app.models.project import Project
+from app.tests.conftest import bearer
+
+EXPORTS = [
+    ("expenses", list(EXPENSE_EXPORT_COLUMNS)),
+    ("inventory", list(INVENTORY_EXPORT_COLUMNS)),
+]
+
+
+@pytest.fixture
+def empty_project_id(engine, world) -> int:
+    with Session(engine) as session:
+        owner = session.get(Project, world.project_id)
+        project = Project(title="Proyecto vacío", description="Sin gastos ni inventario", admin_id=owner.admin_id,
+                          limit_budget=1_000, location="Girona", start_date=datetime(2025, 1, 1),
+                          end_date=datetime(2025, 2, 1))
+        session.add(project)
+        session.commit()
+        return project.id
+
+
+class TestExports:
+
+    @pytest.mark.parametrize("resource, fields", EXPORTS)
+    def test_csv(self, api, world, resource, fields):
+        response = api.get(f"/projects/{world.project_id}/{resource}/export", headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        assert response.headers["content-disposition"].endswith(f'{resource}.csv"')
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == fields
+        assert len(rows) == 2 and rows[1][0] == str(world.expense_id if resource == "expenses" else world.item_id)
+
+    @pytest.mark.parametrize("resource, fields", EXPORTS)
+    def test_ndjson(self, api, world, resource, fields):
+        response = api.get(f"/projects/{world.project_id}/{resource}/export", params={"format": "ndjson"},
+                           headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        [record] = [json.loads(line) for line in response.text.splitlines()]
+        assert list(record) == fields
+        assert record["status"] == ("Pending" if resource == "expenses" else "In_Budget")
+
+    # Proyecto sin filas: el CSV conserva la cabecera y el NDJSON queda vacío
+    @pytest.mark.parametrize("resource, fields", EXPORTS)
+    def test_empty_project(self, api, world, empty_project_id, resource, fields):
+        url = f"/projects/{empty_project_id}/{resource}/export"
+
+        csv_response = api.get(url, headers=bearer(world.admin_user_id))
+        ndjson_response = api.get(url, params={"format": "ndjson"}, headers=bearer(world.admin_user_id))
+
+        assert list(csv.reader(io.StringIO(csv_response.text))) == [fields]
+        assert ndjson_response.status_code == 200 and ndjson_response.text == ""
+
+    @pytest.mark.parametrize("resource", ["expenses", "inventory"])
+    def test_unknown_project(self, api, world, resource):
+        response = api.get(f"/projects/999/{resource}/export", headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 404
+
+    # Solo los miembros del proyecto exportan: un cliente de otro proyecto recibe 403
+    @pytest.mark.parametrize("resource", ["expenses", "inventory"])
+    def test_outsider_is_rejected(self, api, world, resource):
+        response = api.get(f"/projects/{world.project_id}/{resource}/export", headers=bearer(world.outsider_user_id))
+
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize("resource", ["expenses", "inventory"])
+    def test_project_client_can_export(self, api, world, resource):
+        response = api.get(f"/projects/{world.project_id}/{resource}/export", headers=bearer(world.client_user_id))
+
+        assert response.status_code == 200
@@ -0,0 +1,136 @@
+"""Importación en streaming de gastos e inventario sobre la AsyncSession de la petición."""
+import json
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.queries import track_queries
+from app.crud.expense import import_expense_batch
+from app.models.activity import Activity, ActivityType
+from app.models.bulk import ImportReport
+from app.models.expense import Expense
+from app.models.inventory import InventoryItem
+from app.models.project_expense import ProjectExpenseLink
+from app.tests.conftest import bearer
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    # Varios lotes por importación: todos deben ir a la misma transacción
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 2)
+
+
+class TestImports:
+
+    def test_expenses_csv(self, api, engine, world):
+        body = (
+            "date,title,category,description,amount,approved_by\n"
+            "2025-02-01,Arena,Materials,Sacos,30,Ana\n"
+            "2025-02-02,Grúa,Transport,Alquiler,-5,\n"
+            "2025-02-03,Yeso,Materials,Sacos,20,\n"
+        )
+
+        response = api.post(f"/projects/{world.project_id}/expenses/import", content=body.encode(),
+                            headers={**bearer(world.admin_user_id), "Content-Type": "text/csv"})
+
+        report = response.json()["data"]
+        assert response.status_code == 200
+        assert (report["imported"], report["failed"]) == (2, 1)
+        assert report["errors"][0]["row"] == 2
+        with Session(engine) as session:
+            assert sorted(session.exec(
+                select(Expense.title).join(ProjectExpenseLink, ProjectExpenseLink.expense_id == Expense.id)
+                .where(Expense.project_id == world.project_id)
+            ).all()) == ["Arena", "Cemento", "Yeso"]
+            activity = session.exec(select(Activity)).one()
+            assert activity.activity_type == ActivityType.EXPENSE_ADDED
+            assert activity.metadatas == {"import": True, "imported": 2, "amount": 50.0}
+
+    # Un lote son tres sentencias sea cual sea su tamaño: executemany de gastos, SELECT de sus ids y executemany de links
+    def test_expense_batch_statements(self, engine, world):
+        records = [(row, {"date": "2025-02-01", "title": f"Gasto {row}", "category": "Materials",
+                          "description": "Lote", "amount": row, "approved_by": f"Revisor {row}"})
+                   for row in range(1, 51)]
+        report = ImportReport()
+
+        with Session(engine) as session, track_queries(n_plus_one_threshold=0) as stats:
+            import_expense_batch(session, world.project_id, records[:25], report)
+            import_expense_batch(session, world.project_id, records[25:], report)
+            session.commit()
+
+        assert stats.count == 6
+        assert report.imported == 50
+        with Session(engine) as session:
+            links = session.exec(
+                select(Expense.title, ProjectExpenseLink.approved_by)
+                .join(ProjectExpenseLink, ProjectExpenseLink.expense_id == Expense.id)
+                .where(Expense.title != "Cemento")
+            ).all()
+        assert sorted(links) == sorted((f"Gasto {row}", f"Revisor {row}") for row in range(1, 51))
+
+    # Los items existentes se actualizan por nombre y el resto se crean
+    def test_inventory_ndjson_upserts_by_name(self, api, engine, world):
+        rows = [
+            {"name": "Azulejo", "category": "Materials", "total": 80, "unit": "m2", "unitCost": 11,
+             "supplier": "Proveedor"},
+            {"name": "Cola", "category": "Materials", "total": 5, "unit": "kg", "unit_cost": 4,
+             "supplier": "Proveedor"},
+            {"name": "Sin total", "category": "Materials", "unit": "kg", "unit_cost": 4, "supplier": "Proveedor"},
+        ]
+        body = "".join(json.dumps(row) + "\n" for row in rows)
+
+        response = api.post(f"/projects/{world.project_id}/inventory/import", content=body.encode(),
+                            headers={**bearer(world.admin_user_id), "Content-Type": "application/x-ndjson"})
+
+        report = response.json()["data"]
+        assert (report["imported"], report["updated"], report["failed"]) == (1, 1, 1)
+        with Session(engine) as session:
+            items = {item.name: item for item in session.exec(select(InventoryItem)).all()}
+        assert sorted(items) == ["Azulejo", "Cola"]
+        assert (items["Azulejo"].total, items["Azulejo"].unit_cost) == (80, 11)
+
+    # El nombre se compara sin distinguir mayúsculas, también en SQLite
+    def test_inventory_name_ignores_case(self, api, engine, world):
+        body = json.dumps({"name": "azulejo", "category": "Materials", "total": 60, "unit": "m2", "unit_cost": 12,
+                           "supplier": "Proveedor"}) + "\n"
+
+        response = api.post(f"/projects/{world.project_id}/inventory/import", content=body.encode(),
+                            headers={**bearer(world.admin_user_id), "Content-Type": "application/x-ndjson"})
+
+        assert (response.json()["data"]["imported"], response.json()["data"]["updated"]) == (0, 1)
+        with Session(engine) as session:
+            assert session.exec(select(InventoryItem.name, InventoryItem.total)).all() == [("Azulejo", 60)]
+
+    # Un total por debajo de lo ya usado dejaría remaining negativo: la fila se rechaza
+    def test_inventory_total_below_used_fails_row(self, api, engine, world):
+        with Session(engine) as session:
+            item = session.get(InventoryItem, world.item_id)
+            item.used, item.remaining = 30, 20
+            session.add(item)
+            session.commit()
+        body = json.dumps({"name": "Azulejo", "category": "Materials", "total": 10, "unit": "m2", "unit_cost": 12,
+                           "supplier": "Proveedor"}) + "\n"
+
+        response = api.post(f"/projects/{world.project_id}/inventory/import", content=body.encode(),
+                            headers={**bearer(world.admin_user_id), "Content-Type": "application/x-ndjson"})
+
+        report = response.json()["data"]
+        assert (report["updated"], report["failed"]) == (0, 1)
+        assert report["errors"][0]["row"] == 1
+        with Session(engine) as session:
+            item = session.get(InventoryItem, world.item_id)
+            assert (item.total, item.remaining) == (50, 20)
+
+    def test_unsupported_content_type(self, api, world):
+        response = api.post(f"/projects/{world.project_id}/expenses/import", content=b"{}",
+                            headers={**bearer(world.admin_user_id), "Content-Type": "text/plain"})
+
+        assert response.status_code == 415
+
+    @pytest.mark.parametrize("resource", ["expenses", "inventory"])
+    def test_unknown_project(self, api, world, resource):
+        response = api.post(f"/projects/999/{resource}/import", content=b"",
+                            headers={**bearer(world.admin_user_id), "Content-Type": "text/csv"})
+
+        assert response.status_code == 404
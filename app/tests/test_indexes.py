@@ -0,0 +1,117 @@
+"""Comprueba con EXPLAIN QUERY PLAN (SQLite) que las consultas CRUD usan los índices."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import app.crud.follow as follow_crud
+import app.crud.notification as notification_crud
+import app.crud.project as project_crud
+import app.crud.user as user_crud
+from app.models.expense import Expense
+from app.models.inventory import InventoryItem
+from app.models.project import Project
+from app.models.project_client import ProjectClient
+from app.models.project_team import ProjectTeamLink
+from app.models.user import Admin, Client, User, UserRole
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        admin_user = User(name="Admin", username="admin", email="admin@test", password="x",
+                          role=UserRole.ADMIN, phone="600000000")
+        client_user = User(name="Client", username="client", email="client@test", password="x",
+                           role=UserRole.CLIENT, phone="600000001")
+        session.add_all([admin_user, client_user])
+        session.commit()
+        admin = Admin(user_id=admin_user.id)
+        client = Client(user_id=client_user.id)
+        session.add_all([admin, client])
+        session.commit()
+        project = Project(title="Reforma", description="d", admin_id=admin.id, limit_budget=1000,
+                          location="Barcelona", start_date=datetime(2025, 1, 1),
+                          end_date=datetime(2025, 1, 1) + timedelta(days=30))
+        session.add(project)
+        session.commit()
+        session.add(ProjectClient(project_id=project.id, client_id=client.id))
+        session.commit()
+        yield session
+
+
+def query_plans(session: Session, call) -> list[tuple[str, str]]:
+    """Ejecuta `call` y devuelve (sql, plan) de cada sentencia SELECT emitida."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    connection = session.connection()
+    return [
+        (sql, " | ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)))
+        for sql, params in statements
+    ]
+
+
+def assert_uses_index(plans: list[tuple[str, str]], table: str, index: str):
+    matching = [plan for sql, plan in plans if f"FROM {table}" in sql or f"JOIN {table}" in sql]
+    assert matching, f"No query touched {table}"
+    assert any(index in plan for plan in matching), f"{index} not used: {matching}"
+
+
+def test_activity_feed_uses_project_created_at_index(session):
+    plans = query_plans(session, lambda: notification_crud.get_user_activities(session=session, user_id=1))
+    assert_uses_index(plans, "activity", "ix_activity_project_id_created_at")
+
+
+def test_project_summary_uses_task_project_index(session):
+    plans = query_plans(session, lambda: project_crud.get_projects_summary(session=session, project_ids=[1]))
+    assert_uses_index(plans, "task", "ix_task_project_id")
+
+
+def test_expense_by_project_uses_index(session):
+    plans = query_plans(session, lambda: session.exec(select(Expense).where(Expense.project_id == 1)).all())
+    assert_uses_index(plans, "expense", "ix_expense_project_id")
+
+
+def test_inventory_lookup_by_name_uses_composite_index(session):
+    plans = query_plans(session, lambda: session.exec(
+        select(InventoryItem)
+        .where(InventoryItem.project_id == 1)
+        .where(InventoryItem.name == "Cemento")
+    ).first())
+    assert_uses_index(plans, "inventoryitem", "ix_inventoryitem_project_id_name")
+
+
+def test_followers_use_following_status_index(session):
+    plans = query_plans(session, lambda: follow_crud.get_followers(session=session, user_id=1))
+    assert_uses_index(plans, "follow", "ix_follow_following_id_status")
+
+
+def test_client_projects_use_client_index(session):
+    plans = query_plans(session, lambda: project_crud.get_projects(session=session, user_id=2))
+    assert_uses_index(plans, "projectclient", "ix_projectclient_client_id")
+
+
+def test_worker_projects_use_worker_index(session):
+    plans = query_plans(session, lambda: session.exec(
+        select(Project.id).join(ProjectTeamLink).where(ProjectTeamLink.worker_id == 1)
+    ).all())
+    assert_uses_index(plans, "projectteamlink", "ix_projectteamlink_worker_id")
+
+
+def test_role_profile_lookup_uses_unique_user_index(session):
+    plans = query_plans(session, lambda: user_crud.get_user_client(session=session, user_id=2))
+    assert_uses_index(plans, "client", "sqlite_autoindex_client_1")
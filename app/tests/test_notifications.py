@@ -0,0 +1,221 @@
+"""Estado de lectura, contadores de no leídas, paginación del feed, outbox y stream de actividades."""
+import asyncio
+import base64
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, select, update
+
+from app.core.config import settings
+from app.core.events import EventBroker, broker
+from app.models.activity import Activity, ActivityRead, ActivityService, ActivityType, ActivityUnreadCounter
+from app.tests.conftest import bearer
+
+
+def log(engine, world, *activity_types: ActivityType) -> list[int]:
+    """Registra actividades en el proyecto de `world` como lo haría un CRUD y devuelve sus ids."""
+    with Session(engine) as session:
+        service = ActivityService(session)
+        activities = [service.log_activity(activity_type, world.project_id, "Reforma cocina")
+                      for activity_type in activity_types]
+        session.commit()
+        return [activity.id for activity in activities]
+
+
+def unread(engine, world) -> dict:
+    with Session(engine) as session:
+        return dict(session.exec(
+            select(ActivityUnreadCounter.user_id, ActivityUnreadCounter.unread_count)
+            .where(ActivityUnreadCounter.project_id == world.project_id)
+        ).all())
+
+
+def encode_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+class TestUnreadCounters:
+
+    # El admin cuenta todas las actividades y el cliente todas salvo las de gastos
+    def test_increments_per_role(self, engine, world):
+        log(engine, world, ActivityType.TASK_CREATED, ActivityType.EXPENSE_ADDED)
+        log(engine, world, ActivityType.INVENTORY_ADDED)
+
+        assert unread(engine, world) == {world.admin_user_id: 3, world.client_user_id: 2}
+
+    def test_mark_read_decrements_once(self, api, engine, world):
+        task_id, expense_id = log(engine, world, ActivityType.TASK_CREATED, ActivityType.EXPENSE_ADDED)
+
+        for activity_id in (task_id, task_id):
+            response = api.put(f"/notifications/{activity_id}/read", headers=bearer(world.client_user_id))
+            assert response.status_code == 200
+        api.put(f"/notifications/{expense_id}/read", headers=bearer(world.admin_user_id))
+
+        assert unread(engine, world) == {world.admin_user_id: 1, world.client_user_id: 0}
+
+    # Un cliente no puede leer actividades de gastos ni un usuario ajeno las del proyecto
+    @pytest.mark.parametrize("user, activity_type", [
+        ("client", ActivityType.EXPENSE_ADDED),
+        ("outsider", ActivityType.TASK_CREATED),
+    ])
+    def test_mark_read_rejects_non_recipients(self, api, engine, world, user, activity_type):
+        [activity_id] = log(engine, world, activity_type)
+        before = unread(engine, world)
+
+        response = api.put(f"/notifications/{activity_id}/read",
+                           headers=bearer(getattr(world, f"{user}_user_id")))
+
+        assert response.status_code == 403
+        assert unread(engine, world) == before
+        with Session(engine) as session:
+            assert session.exec(select(ActivityRead)).all() == []
+
+    def test_mark_read_unknown_activity(self, api, world):
+        response = api.put("/notifications/999/read", headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 404
+
+    def test_unread_count_route(self, api, engine, world):
+        log(engine, world, ActivityType.TASK_CREATED, ActivityType.EXPENSE_ADDED)
+
+        response = api.get("/notifications/unread_count", headers=bearer(world.client_user_id))
+
+        assert response.json()["data"] == {"total": 1, "projects": {str(world.project_id): 1}}
+
+
+class TestMarkAllRead:
+
+    def test_read_until_moves_forward(self, api, engine, world):
+        log(engine, world, ActivityType.TASK_CREATED, ActivityType.EXPENSE_ADDED, ActivityType.TASK_UPDATED)
+        url = f"/notifications/{world.project_id}/mark_all_read"
+
+        first = api.put(url, headers=bearer(world.client_user_id)).json()["data"]
+        log(engine, world, ActivityType.TASK_COMPLETED)
+        assert unread(engine, world)[world.client_user_id] == 1
+        second = api.put(url, headers=bearer(world.client_user_id)).json()["data"]
+
+        # Los gastos no se marcan para el cliente y cada llamada solo toma lo registrado hasta entonces
+        assert first["updated"] == 2
+        assert second["updated"] == 1
+        assert datetime.fromisoformat(second["read_until"]) > datetime.fromisoformat(first["read_until"])
+        assert unread(engine, world)[world.client_user_id] == 0
+        assert api.put(url, headers=bearer(world.client_user_id)).status_code == 404
+
+    def test_outsider_is_rejected(self, api, engine, world):
+        log(engine, world, ActivityType.TASK_CREATED)
+
+        response = api.put(f"/notifications/{world.project_id}/mark_all_read",
+                           headers=bearer(world.outsider_user_id))
+
+        assert response.status_code == 403
+
+
+class TestActivityFeedPagination:
+
+    # Actividades con el mismo created_at: el id desempata y ninguna se repite ni se pierde entre páginas
+    def test_pages_cover_the_feed_once(self, api, engine, world):
+        ids = log(engine, world, *[ActivityType.TASK_CREATED] * 7)
+        with Session(engine) as session:
+            session.exec(update(Activity).values(created_at=datetime(2025, 3, 1)))
+            session.commit()
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3} | ({"cursor": cursor} if cursor else {})
+            page = api.get("/notifications/", params=params, headers=bearer(world.admin_user_id)).json()["data"]
+            seen += [activity["id"] for activity in page["activities"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == sorted(ids, reverse=True)
+
+    @pytest.mark.parametrize("cursor", [
+        "not-a-cursor",
+        encode_cursor("2025-03-01T00:00:00"),
+        encode_cursor("yesterday|4"),
+        encode_cursor("2025-03-01T00:00:00|last"),
+    ])
+    def test_invalid_cursor(self, api, engine, world, cursor):
+        log(engine, world, ActivityType.TASK_CREATED)
+
+        response = api.get("/notifications/", params={"cursor": cursor}, headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 400
+        assert response.json()["message"] == "Invalid cursor"
+
+
+class TestActivityOutbox:
+
+    @pytest.fixture(autouse=True)
+    def outbox_async(self, monkeypatch):
+        monkeypatch.setattr(settings, "ACTIVITY_OUTBOX_ASYNC", True)
+
+    def dispatch_pending(self, engine, batch_size: int = 10) -> int:
+        with Session(engine) as session:
+            return ActivityService(session).dispatch_pending(batch_size=batch_size)
+
+    def test_dispatch_pending_marks_rows_dispatched(self, engine, world):
+        log(engine, world, ActivityType.TASK_CREATED, ActivityType.EXPENSE_ADDED, ActivityType.TASK_UPDATED)
+        assert unread(engine, world) == {}
+
+        assert self.dispatch_pending(engine, batch_size=2) == 2
+        assert self.dispatch_pending(engine, batch_size=2) == 1
+        assert self.dispatch_pending(engine, batch_size=2) == 0
+
+        with Session(engine) as session:
+            assert session.exec(select(Activity.dispatched)).all() == [True, True, True]
+        assert unread(engine, world) == {world.admin_user_id: 3, world.client_user_id: 2}
+
+    # Leída antes del reparto: no se descontó al leerla, así que tampoco se suma después
+    def test_activity_read_before_dispatch_is_not_counted(self, api, engine, world):
+        read_id, _ = log(engine, world, ActivityType.TASK_CREATED, ActivityType.TASK_UPDATED)
+        api.put(f"/notifications/{read_id}/read", headers=bearer(world.client_user_id))
+
+        self.dispatch_pending(engine)
+
+        assert unread(engine, world) == {world.admin_user_id: 2, world.client_user_id: 1}
+
+
+class TestEventBroker:
+
+    def test_publish_reaches_project_subscribers_only(self):
+        broker = EventBroker(max_queue_size=10)
+
+        async def scenario():
+            async with broker.subscribe([1]) as first, broker.subscribe([2]) as second:
+                broker.publish(1, "event")
+                received = await asyncio.wait_for(first.get(), timeout=1)
+                await asyncio.sleep(0)
+                return received, second.empty()
+
+        assert asyncio.run(scenario()) == ("event", True)
+
+    # Un suscriptor lento pierde los eventos más antiguos en lugar de bloquear la publicación
+    def test_full_queue_drops_oldest(self):
+        broker = EventBroker(max_queue_size=2)
+
+        async def scenario():
+            async with broker.subscribe([1]) as queue:
+                for item in range(3):
+                    broker.publish(1, item)
+                await asyncio.sleep(0)
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        assert asyncio.run(scenario()) == [1, 2]
+
+    # Los eventos se publican al confirmar la transacción del CRUD y se descartan si se deshace
+    def test_activities_are_published_on_commit(self, engine, world):
+        async def scenario():
+            async with broker.subscribe([world.project_id]) as queue:
+                with Session(engine) as session:
+                    ActivityService(session).log_activity(ActivityType.TASK_DELETED, world.project_id, "Reforma")
+                    session.rollback()
+                    ActivityService(session).log_activity(ActivityType.TASK_CREATED, world.project_id, "Reforma")
+                    await asyncio.sleep(0)
+                    assert queue.empty()
+                    session.commit()
+                event = await asyncio.wait_for(queue.get(), timeout=1)
+                return event.activity_type, queue.empty()
+
+        assert asyncio.run(scenario()) == (ActivityType.TASK_CREATED, True)
@@ -0,0 +1,86 @@
+"""Contador de sentencias y detector de N+1 de app/core/queries.py."""
+import pytest
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import app.crud.project  # noqa: F401  Registra todos los modelos relacionados en SQLModel.metadata
+from app.core.queries import NPlusOneQueryError, track_queries
+from app.models.user import User, UserRole, Worker
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        users = [User(name=f"Worker {i}", username=f"worker{i}", email=f"worker{i}@test", password="x",
+                      role=UserRole.WORKER, phone=f"6000000{i:02d}") for i in range(12)]
+        session.add_all(users)
+        session.commit()
+        session.add_all([Worker(user_id=user.id) for user in users])
+        session.commit()
+    # Sesión nueva: sin objetos en el identity map, cada relación perezosa lanza su SELECT
+    with Session(engine) as session:
+        yield session
+
+
+def worker_names(session: Session, statement) -> list[str]:
+    names = []
+    for worker in session.exec(statement).all():
+        names.append(worker.user.name)
+    return names
+
+
+class TestTrackQueries:
+
+    def test_counts_statements(self, session):
+        with track_queries() as stats:
+            session.exec(select(User)).all()
+            session.exec(select(Worker)).all()
+
+        assert stats.count == 2
+        assert stats.duration > 0
+        assert not stats.n_plus_one
+
+    # Una relación perezosa por fila repite el mismo SELECT con distintos parámetros
+    def test_detects_lazy_load_per_row(self, session):
+        with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=False) as stats:
+            worker_names(session, select(Worker))
+
+        assert stats.count == 13
+        [(statement, origin)] = stats.n_plus_one.items()
+        assert "FROM user" in statement
+        assert origin.startswith("worker_names (app/tests/test_queries.py:")
+
+    # La misma consulta con los mismos parámetros (p. ej. un sondeo) no es un N+1
+    def test_identical_parameters_are_not_flagged(self, session):
+        with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=True) as stats:
+            for _ in range(12):
+                session.exec(select(User).where(User.id == 1)).all()
+
+        assert stats.count == 12
+        assert not stats.n_plus_one
+
+    def test_raises_when_enabled(self, session):
+        with pytest.raises(NPlusOneQueryError, match="12 executions from worker_names"):
+            with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=True):
+                worker_names(session, select(Worker))
+
+    def test_eager_loading_is_not_flagged(self, session):
+        with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=True) as stats:
+            names = worker_names(session, select(Worker).options(selectinload(Worker.user)))
+
+        assert len(names) == 12
+        assert stats.count == 2
+
+    # Un bloque anidado (el middleware de métricas dentro de un test) cuenta también en el exterior
+    def test_nested_blocks_count_in_parent(self, session):
+        with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=False) as outer:
+            session.exec(select(User)).all()
+            with track_queries(n_plus_one_threshold=5, raise_on_n_plus_one=False) as inner:
+                worker_names(session, select(Worker))
+
+        assert inner.count == 13
+        assert outer.count == 14
+        assert len(outer.n_plus_one) == 1
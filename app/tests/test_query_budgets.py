@@ -0,0 +1,167 @@
+"""
+Presupuesto de sentencias SQL y de tiempo por ruta, con la aplicación completa sobre SQLite
+sembrado con volúmenes realistas. Si un cambio vuelve a cargar relaciones fila a fila
+(N+1) o añade consultas a una ruta caliente, falla aquí.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_async_session, get_session
+from app.core.queries import track_queries
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.activity import ActivityService, ActivityType
+from app.models.expense import Expense
+from app.models.inventory import InventoryItem
+from app.models.project import Project
+from app.models.project_client import ProjectClient
+from app.models.project_expense import ProjectExpenseLink
+from app.models.project_team import ProjectTeamLink
+from app.models.task import Task
+from app.models.user import Admin, Client, Follow, FollowStatus, User, UserRole, Worker, WorkerSkill
+
+PASSWORD = "secret"
+PROJECTS = 10
+WORKERS = 40
+CLIENTS = 5
+TEAM_SIZE = 15
+TASKS_PER_PROJECT = 50
+EXPENSES_PER_PROJECT = 100
+ITEMS_PER_PROJECT = 30
+ACTIVITIES_PER_PROJECT = 40
+TASK_STATUSES = ("todo", "in_progress", "done")
+
+# (usuario, ruta, máximo de sentencias, máximo de segundos por llamada). Las sentencias no
+# dependen del volumen (todas las relaciones se cargan con selectinload); si una ruta
+# necesita más, que sea una decisión explícita al cambiar este número.
+BUDGETS = [
+    ("admin", "/projects/", 23, 1.0),
+    ("admin", "/projects/?view=summary", 7, 1.0),
+    ("client", "/projects/", 23, 1.0),
+    ("worker0", "/projects/", 23, 1.0),
+    ("admin", "/projects/1", 18, 1.0),
+    ("admin", "/users/me", 13, 1.0),
+    ("client", "/users/me", 7, 1.0),
+    ("worker0", "/users/me", 10, 1.0),
+    ("admin", "/notifications/", 6, 1.0),
+    ("client", "/notifications/", 5, 1.0),
+    ("admin", "/follows/workers", 6, 1.0),
+    ("admin", "/follows/follows_user", 5, 1.0),
+]
+
+
+def seed(session: Session):
+    password = get_password_hash(PASSWORD)  # Un solo hash: bcrypt es lento a propósito
+
+    def user(username: str, role: UserRole, i: int) -> User:
+        return User(name=username.title(), username=username, email=f"{username}@test", password=password,
+                    role=role, phone=f"6{i:08d}")
+
+    admin_user = user("admin", UserRole.ADMIN, 0)
+    client_users = [user(f"client{i}" if i else "client", UserRole.CLIENT, 100 + i) for i in range(CLIENTS)]
+    worker_users = [user(f"worker{i}", UserRole.WORKER, 200 + i) for i in range(WORKERS)]
+    session.add_all([admin_user, *client_users, *worker_users])
+    session.commit()
+
+    admin = Admin(user_id=admin_user.id)
+    clients = [Client(user_id=u.id) for u in client_users]
+    workers = [Worker(user_id=u.id, specialty="Paleta", availability="Full-time") for u in worker_users]
+    session.add_all([admin, *clients, *workers])
+    session.commit()
+
+    session.add_all([WorkerSkill(worker_id=w.id, name=name) for w in workers for name in ("Albañilería", "Pintura")])
+    session.add_all([Follow(follower_id=u.id, following_id=admin_user.id, status=FollowStatus.ACCEPTED)
+                     for u in [*client_users, *worker_users[:-5]]])
+    session.add_all([Follow(follower_id=u.id, following_id=admin_user.id, status=FollowStatus.PENDING)
+                     for u in worker_users[-5:]])
+
+    start = datetime(2025, 1, 1)
+    for p in range(PROJECTS):
+        project = Project(title=f"Proyecto {p}", description="Reforma integral", admin_id=admin.id,
+                          limit_budget=50_000, location="Barcelona", start_date=start,
+                          end_date=start + timedelta(days=90))
+        session.add(project)
+        session.flush()
+        team = [workers[(p * 7 + i) % WORKERS] for i in range(TEAM_SIZE)]
+        session.add(ProjectClient(project_id=project.id, client_id=clients[p % CLIENTS].id))
+        session.add_all([ProjectTeamLink(project_id=project.id, worker_id=w.id, role="Paleta") for w in team])
+        session.add_all([
+            Task(project_id=project.id, admin_id=admin.id, worker_id=team[i % TEAM_SIZE].id, title=f"Tarea {i}",
+                 status=TASK_STATUSES[i % 3], due_date=start + timedelta(days=i))
+            for i in range(TASKS_PER_PROJECT)
+        ])
+        expenses = [
+            Expense(title=f"Gasto {i}", project_id=project.id, expense_date=start + timedelta(days=i % 90),
+                    category="Materials", description="Material", amount=10 + i, status="Pending")
+            for i in range(EXPENSES_PER_PROJECT)
+        ]
+        session.add_all(expenses)
+        session.flush()
+        session.add_all([ProjectExpenseLink(project_id=project.id, expense_id=e.id) for e in expenses])
+        session.add_all([
+            InventoryItem(name=f"Material {i}", category="Materials", total=100, unit="kg", unit_cost=2.5,
+                          supplier="Proveedor", status="In_Budget", project_id=project.id)
+            for i in range(ITEMS_PER_PROJECT)
+        ])
+        activities = ActivityService(session)
+        for i in range(ACTIVITIES_PER_PROJECT):
+            activities.log_activity(ActivityType.TASK_CREATED, project.id, project.title,
+                                    metadatas={"title": f"Tarea {i}"})
+        session.commit()
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = tmp_path_factory.mktemp("budgets") / "budgets.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session)
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    async def override_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_async_session] = override_async_session
+    # Sin `with`: no se ejecuta el startup, que crearía las tablas en la base de datos configurada
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def headers(client):
+    tokens = {}
+    for username in {username for username, *_ in BUDGETS}:
+        response = client.post("/users/token", data={"username": username, "password": PASSWORD})
+        tokens[username] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return tokens
+
+
+class TestQueryBudgets:
+
+    @pytest.mark.parametrize("username, path, max_queries, max_seconds", BUDGETS)
+    def test_route_within_budget(self, client, headers, username, path, max_queries, max_seconds):
+        client.get(path, headers=headers[username])  # Calienta cachés de SQLAlchemy y Pydantic
+
+        with track_queries(context=f"GET {path}", raise_on_n_plus_one=True) as stats:
+            start = time.perf_counter()
+            response = client.get(path, headers=headers[username])
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert response.json()["statusCode"] == 200, response.json()["message"]
+        assert stats.count <= max_queries, f"{path} as {username}: {stats.count} statements"
+        assert elapsed <= max_seconds, f"{path} as {username}: {elapsed:.3f}s"
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.records import RecordError, iter_record_batches
+
+
+async def as_chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def read_batches(data: bytes, content_type: str, batch_size: int = 100, chunk_size: int = 3):
+    async def collect():
+        return [batch async for batch in iter_record_batches(as_chunks(data, chunk_size), content_type, batch_size)]
+    return asyncio.run(collect())
+
+
+class TestIterRecordBatches:
+
+    # Los campos entre comillas pueden contener saltos de línea y comas, aunque lleguen partidos entre chunks
+    def test_csv_quoted_fields_across_chunks(self):
+        data = 'title,description,amount\r\nCompra,"línea 1\nlínea 2, con coma",10\r\nTransporte,,5\r\n'.encode()
+
+        [batch] = read_batches(data, "text/csv; charset=utf-8")
+
+        assert batch == [
+            (1, {"title": "Compra", "description": "línea 1\nlínea 2, con coma", "amount": "10"}),
+            (2, {"title": "Transporte", "amount": "5"}),
+        ]
+
+    # Una fila con columnas de más o de menos se reporta sin detener la lectura
+    def test_csv_column_mismatch_is_reported(self):
+        [batch] = read_batches(b"title,amount\nA\nB,2\n", "text/csv")
+
+        assert isinstance(batch[0][1], RecordError)
+        assert batch[1] == (2, {"title": "B", "amount": "2"})
+
+    def test_ndjson_invalid_lines_are_reported(self):
+        data = b'{"title": "A"}\n\n{bad\n[1]\n{"title": "B"}'
+
+        [batch] = read_batches(data, "application/x-ndjson")
+
+        assert [row for row, _ in batch] == [1, 2, 3, 4]
+        assert batch[0][1] == {"title": "A"} and batch[3][1] == {"title": "B"}
+        assert all(isinstance(record, RecordError) for _, record in batch[1:3])
+
+    def test_records_are_split_in_batches(self):
+        data = b"".join(b'{"n": %d}\n' % n for n in range(5))
+
+        batches = read_batches(data, "application/x-ndjson", batch_size=2)
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    def test_unsupported_content_type(self):
+        with pytest.raises(HTTPException) as exc:
+            read_batches(b"{}", "text/plain")
+        assert exc.value.status_code == 415
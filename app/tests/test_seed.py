@@ -0,0 +1,64 @@
+"""Generador de datos sintéticos de benchmarks/seed.py."""
+from sqlalchemy import func
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.activity import EXPENSE_ACTIVITY_TYPES, Activity, ActivityUnreadCounter
+from app.models.project import Project
+from app.models.project_expense import ProjectExpenseLink
+from app.models.task import Task
+from benchmarks.seed import SeedVolumes, seed_database
+
+VOLUMES = SeedVolumes(admins=2, clients=5, workers=8, projects=7, clients_per_project=2, team_size=3,
+                      tasks_per_project=4, expenses_per_project=3, items_per_project=2, activities_per_project=6)
+
+
+def seeded_engine(seed: int = 0, batch_size: int = 5_000):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    seed_database(engine, VOLUMES, seed=seed, batch_size=batch_size)
+    return engine
+
+
+def dump(engine) -> dict:
+    """Filas de cada tabla, ordenadas, para comparar dos bases de datos (bcrypt sala cada hash)."""
+    with engine.connect() as connection:
+        return {
+            table.name: sorted(
+                (tuple(value for column, value in row._mapping.items() if column != "password")
+                 for row in connection.execute(table.select())),
+                key=repr
+            )
+            for table in SQLModel.metadata.sorted_tables
+        }
+
+
+class TestSeedDatabase:
+
+    # Misma semilla: mismas filas e ids, sea cual sea el tamaño de lote
+    def test_is_deterministic(self):
+        first = dump(seeded_engine(seed=7))
+
+        assert dump(seeded_engine(seed=7, batch_size=10)) == first
+        assert dump(seeded_engine(seed=8)) != first
+
+    def test_generates_requested_volumes(self):
+        with Session(seeded_engine()) as session:
+            assert session.scalar(select(func.count()).select_from(Project)) == 7
+            assert session.scalar(select(func.count()).select_from(Task)) == 28
+            assert session.scalar(select(func.count()).select_from(ProjectExpenseLink)) == 21
+            assert session.scalar(select(func.count()).select_from(Activity)) == 42
+
+    # Los contadores de no leídas coinciden con lo que repartiría ActivityService
+    def test_unread_counters_match_activities(self):
+        with Session(seeded_engine()) as session:
+            for project in session.exec(select(Project)).all():
+                types = [activity.activity_type for activity in project.activities]
+                counters = dict(session.exec(
+                    select(ActivityUnreadCounter.user_id, ActivityUnreadCounter.unread_count)
+                    .where(ActivityUnreadCounter.project_id == project.id)
+                ).all())
+
+                assert counters.pop(project.admin.user_id) == len(types)
+                assert sorted(counters) == sorted(client.user_id for client in project.clients)
+                assert set(counters.values()) == {sum(t not in EXPENSE_ACTIVITY_TYPES for t in types)}
@@ -0,0 +1,141 @@
+"""PUT /projects/{id}: las listas *_backend se validan completas y se aplican con un único commit."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from app.models.activity import Activity, ActivityType, ActivityUnreadCounter
+from app.models.expense import Expense
+from app.models.inventory import InventoryItem
+from app.models.project import Project
+from app.models.project_team import ProjectTeamLink
+from app.models.task import Task
+from app.tests.conftest import bearer
+
+FLAGS = {"created": False, "updated": False, "deleted": False}
+
+
+def team_member(worker_id: int, **flags) -> dict:
+    return {"id": worker_id, "name": "Worker", "role": "Pintor", "phone": "600000004", "skills": [],
+            "tasksCompleted": 0, "tasksInProgress": 0, "efficiency": 0, **FLAGS, **flags}
+
+
+def update_body(world, item_name: str = "Pintura") -> dict:
+    """Un cambio de cada lista: alta de worker, tarea nueva y editada, gasto nuevo, item nuevo y borrado."""
+    due_date = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+    return {
+        "title": "Reforma cocina y baño",
+        "team_backend": [team_member(world.free_worker_id, created=True)],
+        "tasks_backend": [
+            {"id": 0, "title": "Pintar paredes", "worker_id": world.free_worker_id, "due_date": due_date,
+             "status": "todo", **FLAGS, "created": True},
+            {"id": world.task_id, "status": "in_progress", **FLAGS, "updated": True},
+        ],
+        "expenses_backend": [
+            {"id": 0, "expense_date": "2025-02-01T00:00:00", "title": "Pintura", "category": "Materials",
+             "description": "Botes", "amount": 80, "status": "Pending", **FLAGS, "created": True},
+        ],
+        "inventory_backend": [
+            {"id": 0, "name": item_name, "category": "Materials", "total": 10, "unit": "l", "unit_cost": 8,
+             "supplier": "Proveedor", "status": "Pending", "project_id": world.project_id,
+             **FLAGS, "created": True},
+            {"id": world.item_id, **FLAGS, "deleted": True},
+        ],
+    }
+
+
+def snapshot(engine, project_id: int) -> dict:
+    with Session(engine) as session:
+        def count(model, *where):
+            return session.exec(select(func.count()).select_from(model).where(*where)).one()
+
+        return {
+            "title": session.get(Project, project_id).title,
+            "team": count(ProjectTeamLink, ProjectTeamLink.project_id == project_id),
+            "tasks": count(Task, Task.project_id == project_id),
+            "task_statuses": sorted(session.exec(select(Task.status).where(Task.project_id == project_id)).all()),
+            "expenses": count(Expense, Expense.project_id == project_id),
+            "items": sorted(session.exec(
+                select(InventoryItem.name).where(InventoryItem.project_id == project_id)
+            ).all()),
+            "activities": count(Activity, Activity.project_id == project_id),
+            "counters": count(ActivityUnreadCounter, ActivityUnreadCounter.project_id == project_id),
+        }
+
+
+@pytest.fixture
+def commits(engine):
+    """Número de COMMIT enviados a la base de datos durante el test."""
+    counter = []
+    listener = lambda connection: counter.append(connection)
+    event.listen(engine, "commit", listener)
+    yield counter
+    event.remove(engine, "commit", listener)
+
+
+class TestUpdateProject:
+
+    def test_valid_batch_is_committed_once(self, api, engine, world, commits):
+        response = api.put(f"/projects/{world.project_id}", json=update_body(world),
+                           headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 200, response.json()
+        assert len(commits) == 1
+        after = snapshot(engine, world.project_id)
+        assert after["title"] == "Reforma cocina y baño"
+        assert after["team"] == 2
+        assert after["tasks"] == 2 and "in_progress" in after["task_statuses"]
+        assert after["expenses"] == 2
+        assert after["items"] == ["Pintura"]
+
+    # Un item repetido al final del lote: ni el proyecto ni las otras listas quedan a medias
+    def test_invalid_item_rolls_back_everything(self, api, engine, world, commits):
+        before = snapshot(engine, world.project_id)
+
+        response = api.put(f"/projects/{world.project_id}", json=update_body(world, item_name="Azulejo"),
+                           headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 409
+        assert commits == []
+        assert snapshot(engine, world.project_id) == before
+
+    # Los nombres de items se comparan sin distinguir mayúsculas, como en la importación
+    def test_item_name_differing_only_in_case_conflicts(self, api, engine, world):
+        before = snapshot(engine, world.project_id)
+
+        response = api.put(f"/projects/{world.project_id}", json=update_body(world, item_name="AZULEJO"),
+                           headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 409
+        assert snapshot(engine, world.project_id) == before
+
+    # Una tarea para un worker que no entra en el equipo falla aunque el resto sea válido
+    def test_task_for_worker_outside_team_rolls_back(self, api, engine, world):
+        before = snapshot(engine, world.project_id)
+        body = update_body(world)
+        body["team_backend"] = []
+
+        response = api.put(f"/projects/{world.project_id}", json=body, headers=bearer(world.admin_user_id))
+
+        assert response.status_code == 400
+        assert snapshot(engine, world.project_id) == before
+
+    def test_activities_and_unread_counters_are_written(self, api, engine, world):
+        api.put(f"/projects/{world.project_id}", json=update_body(world), headers=bearer(world.admin_user_id))
+
+        with Session(engine) as session:
+            activity_types = sorted(session.exec(
+                select(Activity.activity_type).where(Activity.project_id == world.project_id)
+            ).all())
+            counters = dict(session.exec(
+                select(ActivityUnreadCounter.user_id, ActivityUnreadCounter.unread_count)
+                .where(ActivityUnreadCounter.project_id == world.project_id)
+            ).all())
+
+        assert activity_types == sorted([
+            ActivityType.TASK_CREATED, ActivityType.TASK_UPDATED, ActivityType.EXPENSE_ADDED,
+            ActivityType.INVENTORY_ADDED, ActivityType.INVENTORY_DELETED,
+        ])
+        # El cliente no recibe la actividad del gasto
+        assert counters == {world.admin_user_id: 5, world.client_user_id: 4}
@@ -0,0 +1,250 @@
+"""
+Per-object cost of the DTO converters on the response path (task_to_out,
+expense_to_out, team_member_to_out, team_out, WorkerRead.from_worker,
+FollowOut.from_follow, ActivityOut.from_activity), with synthetic ORM objects
+whose relationships are already loaded, so no database is involved.
+
+    python -m benchmarks.bench_converters                  # compare with the baseline
+    python -m benchmarks.bench_converters --save           # record a new baseline
+    python -m benchmarks.bench_converters --scales 10,1000 --only task_to_out
+
+For each converter and scale it reports, like pytest-benchmark, the min and
+median time per object over --rounds rounds (gc disabled while timing), plus
+the bytes traced by tracemalloc per object: peak during the conversion and
+what stays allocated in the resulting DTOs. Results are compared with
+benchmarks/baselines/converters.json on the min, the least noisy figure; a
+converter more than --tolerance slower than its baseline makes the run exit
+with status 1. Baselines are only
+comparable on the same machine and Python/Pydantic versions. The full run takes
+a couple of minutes (100k objects per converter); --scales 10,1000 is quick.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import pydantic
+from sqlalchemy.orm.attributes import set_committed_value
+
+import app.crud.project  # noqa: F401  Registra todos los modelos relacionados en SQLModel.metadata
+from app.crud.expense import expense_to_out
+from app.models.activity import Activity, ActivityOut, ActivityType
+from app.models.expense import Expense, ExpenseCategory, ExpenseStatus
+from app.models.inventory import InventoryCategory, InventoryItem, InventoryStatus
+from app.models.project import Project, team_member_to_out
+from app.models.project_expense import ProjectExpenseLink
+from app.models.project_team import ProjectTeamLink
+from app.models.task import Task, TaskStatus, task_to_out
+from app.models.user import Follow, FollowOut, FollowStatus, User, UserRole, Worker, WorkerRead, WorkerSkill, team_out
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "converters.json")
+DATE = datetime(2025, 1, 1)
+POOL = 50  # Objetos relacionados compartidos (usuarios, proyectos, tareas...)
+
+
+def loaded(instance, **relationships):
+    """Asigna relaciones como si vinieran cargadas de la base de datos (sin eventos de back_populates)."""
+    for name, value in relationships.items():
+        set_committed_value(instance, name, value)
+    return instance
+
+
+def make_user(i: int, role: UserRole = UserRole.WORKER) -> User:
+    return User(id=i, name=f"User {i}", username=f"user{i}", email=f"user{i}@test", password="x",
+                role=role, phone=f"6{i:08d}", created_at=DATE)
+
+
+def make_task(i: int, worker: Worker) -> Task:
+    return loaded(Task(id=i, project_id=1, admin_id=1, worker_id=worker.id, title=f"Tarea {i}",
+                       description="Descripción", status=list(TaskStatus)[i % 3], created_at=DATE, updated_at=DATE,
+                       due_date=DATE + timedelta(days=i % 30)), worker=worker)
+
+
+class Fixtures:
+    """Objetos relacionados compartidos por todos los escenarios."""
+
+    def __init__(self):
+        self.users = [make_user(i) for i in range(POOL)]
+        self.workers = [loaded(Worker(id=i, user_id=user.id, specialty="Paleta"), user=user)
+                        for i, user in enumerate(self.users)]
+        self.projects = [Project(id=i, title=f"Proyecto {i}", description="d", admin_id=1, limit_budget=1000,
+                                 location="Barcelona", start_date=DATE, end_date=DATE, created_at=DATE, updated_at=DATE)
+                         for i in range(POOL)]
+        self.tasks = [make_task(i, self.workers[i % POOL]) for i in range(POOL)]
+        self.expenses = [Expense(id=i, title=f"Gasto {i}", project_id=1, expense_date=DATE,
+                                 category=ExpenseCategory.MATERIALS, description="d", amount=10.0 + i,
+                                 status=ExpenseStatus.PENDING, created_at=DATE, updated_at=DATE)
+                         for i in range(POOL)]
+        self.items = [InventoryItem(id=i, name=f"Material {i}", category=InventoryCategory.MATERIALS, total=10,
+                                    unit="kg", unit_cost=1.5, supplier="s", status=InventoryStatus.IN_BUDGET,
+                                    project_id=1)
+                      for i in range(POOL)]
+
+
+# Escenarios: crean `n` objetos de entrada y devuelven la función que los convierte todos
+def task_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    tasks = [make_task(i, f.workers[i % POOL]) for i in range(n)]
+    return lambda: [task_to_out(task) for task in tasks]
+
+
+def expense_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    pairs = [(f.expenses[i % POOL], ProjectExpenseLink(project_id=1, expense_id=i, approved_by="Admin",
+                                                        notes="n", updated_at=DATE)) for i in range(n)]
+    return lambda: [expense_to_out(expense, link) for expense, link in pairs]
+
+
+def team_member_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    members = [f.workers[i % POOL] for i in range(n)]
+    return lambda: [team_member_to_out(member) for member in members]
+
+
+def team_out_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    pairs = [(f.workers[i % POOL], ProjectTeamLink(project_id=1, worker_id=i, role="Paleta")) for i in range(n)]
+    return lambda: [team_out(worker, link) for worker, link in pairs]
+
+
+def worker_read_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    workers = [
+        loaded(Worker(id=i, user_id=i, specialty="Paleta"), user=f.users[i % POOL],
+               skills=[WorkerSkill(id=i * 3 + s, name=f"Skill {s}", worker_id=i) for s in range(3)],
+               projects=f.projects[i % 45:i % 45 + 3], tasks=f.tasks[i % 40:i % 40 + 10])
+        for i in range(n)
+    ]
+    return lambda: [WorkerRead.from_worker(worker) for worker in workers]
+
+
+def follow_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    current = make_user(POOL, UserRole.ADMIN)
+    follows = [
+        loaded(Follow(follower_id=f.users[i % POOL].id, following_id=current.id, status=FollowStatus.ACCEPTED,
+                      created_at=DATE, updated_at=DATE), follower=f.users[i % POOL], following=current)
+        for i in range(n)
+    ]
+    return lambda: [FollowOut.from_follow(follow, current_user_id=current.id) for follow in follows]
+
+
+def activity_scenario(f: Fixtures, n: int) -> Callable[[], list]:
+    activities = []
+    for i in range(n):
+        relationship = ("task", "expense", "inventory_item")[i % 3]
+        target = {"task": f.tasks, "expense": f.expenses, "inventory_item": f.items}[relationship][i % POOL]
+        activity = Activity(id=i, project_id=1, activity_type=ActivityType.TASK_CREATED, title_project="Proyecto",
+                            created_at=DATE, metadatas={"title": f"Tarea {i}"})
+        relationships = {"project": f.projects[i % POOL], "task": None, "expense": None, "inventory_item": None}
+        activities.append(loaded(activity, **{**relationships, relationship: target}))
+    return lambda: [ActivityOut.from_activity(activity, is_read=bool(i % 2)) for i, activity in enumerate(activities)]
+
+
+SCENARIOS: Dict[str, Callable[[Fixtures, int], Callable[[], list]]] = {
+    "task_to_out": task_scenario,
+    "expense_to_out": expense_scenario,
+    "team_member_to_out": team_member_scenario,
+    "team_out": team_out_scenario,
+    "WorkerRead.from_worker": worker_read_scenario,
+    "FollowOut.from_follow": follow_scenario,
+    "ActivityOut.from_activity": activity_scenario,
+}
+
+
+def measure(convert: Callable[[], list], n: int, rounds: int, min_time: float) -> dict:
+    """Tiempos por objeto (ns) de `rounds` rondas y bytes por objeto según tracemalloc."""
+    start = time.perf_counter()
+    convert()  # Calentamiento (validadores de Pydantic, cachés de atributos) y calibración
+    # Cada ronda repite la conversión hasta durar al menos `min_time`, como pytest-benchmark
+    repeat = max(1, math.ceil(min_time / max(time.perf_counter() - start, 1e-9)))
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(repeat):
+                convert()
+            timings.append((time.perf_counter_ns() - start) / (n * repeat))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    results = convert()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return {
+        "min_ns": round(min(timings), 1),
+        "median_ns": round(statistics.median(timings), 1),
+        "peak_bytes": round((peak - before) / n, 1),
+        "retained_bytes": round((retained - before) / n, 1),
+    }
+
+
+def compare(result: dict, baseline: dict | None) -> str:
+    if not baseline:
+        return "   (no baseline)"
+    change = result["min_ns"] / baseline["min_ns"] - 1
+    return f"   {change:+7.1%} vs baseline {baseline['min_ns']:9.1f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10,1000,100000", help="comma-separated numbers of objects")
+    parser.add_argument("--rounds", type=int, default=7, help="timed rounds per converter and scale")
+    parser.add_argument("--min-time", type=float, default=0.1, help="minimum seconds per round")
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS), help="run only these converters")
+    parser.add_argument("--save", action="store_true", help=f"store the results as the new baseline ({BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown of the min vs the baseline before failing")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    names = args.only or list(SCENARIOS)
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as file:
+            baseline = json.load(file)["results"]
+
+    fixtures = Fixtures()
+    results: Dict[str, Dict[str, dict]] = {}
+    regressions: List[str] = []
+    print(f"{'converter':<26} {'objects':>8} {'min ns/obj':>11} {'median':>9} {'peak B/obj':>11} {'kept B/obj':>11}")
+    for name in names:
+        for n in scales:
+            convert = SCENARIOS[name](fixtures, n)
+            result = measure(convert, n, args.rounds, args.min_time)
+            results.setdefault(name, {})[str(n)] = result
+            previous = baseline.get(name, {}).get(str(n))
+            print(f"{name:<26} {n:>8} {result['min_ns']:>11.1f} {result['median_ns']:>9.1f} "
+                  f"{result['peak_bytes']:>11.1f} {result['retained_bytes']:>11.1f}{compare(result, previous)}")
+            if previous and result["min_ns"] > previous["min_ns"] * (1 + args.tolerance):
+                regressions.append(f"{name} x{n}")
+            del convert
+            gc.collect()
+
+    if args.save:
+        # Con --only o --scales solo se reemplazan las entradas medidas
+        for name, by_scale in results.items():
+            baseline.setdefault(name, {}).update(by_scale)
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        environment = {"python": platform.python_version(), "pydantic": pydantic.VERSION,
+                       "machine": platform.machine(), "rounds": args.rounds, "min_time": args.min_time}
+        with open(BASELINE, "w") as file:
+            json.dump({"environment": environment, "results": baseline}, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline saved to {os.path.relpath(BASELINE)}")
+    elif regressions:
+        print(f"Slower than the baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
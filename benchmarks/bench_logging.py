@@ -0,0 +1,103 @@
+"""
+Per-request logging overhead: the previous setup (prints on the request path plus
+logging.basicConfig with a FileHandler and a StreamHandler, all synchronous) versus
+the queue-based pipeline of app/core/logs.py, where the prints became logger.debug
+calls and only the QueueListener thread formats and writes.
+
+    python -m benchmarks.bench_logging --requests 20000 --threads 8
+
+Each simulated request makes --prints hot-path print/debug calls and one INFO log,
+like the user and project routes did. stdout and the log file go to temporary files
+so the numbers do not depend on the terminal.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueListener
+
+from app.core.logs import DeferredFormatQueueHandler, JsonFormatter
+
+logger = logging.getLogger("bench.request")
+
+
+def before_request(prints: int, user_id: int):
+    for _ in range(prints):
+        print(f"---------------------[User CRUD] Getting user client for user ID: {user_id}")
+    logger.info("Request served for user %s", user_id)
+
+
+def after_request(prints: int, user_id: int):
+    for _ in range(prints):
+        logger.debug("Getting user client for user %s", user_id)
+    logger.info("Request served for user %s", user_id)
+
+
+def configure(root: logging.Logger, handlers: list[logging.Handler]):
+    for handler in root.handlers:
+        handler.close()
+    root.handlers = handlers
+    root.setLevel(logging.INFO)
+
+
+def run(request, requests: int, threads: int, prints: int) -> tuple[float, float]:
+    """Media y p99, en microsegundos, del tiempo que cada petición pasa logueando."""
+    def timed(user_id: int) -> float:
+        start = time.perf_counter()
+        request(prints, user_id)
+        return time.perf_counter() - start
+
+    if threads == 1:
+        durations = [timed(user_id) for user_id in range(requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            durations = list(executor.map(timed, range(requests)))
+    durations.sort()
+    return sum(durations) * 1_000_000 / requests, durations[int(requests * 0.99)] * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="simulated requests per run")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent threads (sync routes run in a threadpool)")
+    parser.add_argument("--prints", type=int, default=4, help="hot-path prints per request")
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    report = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "stdout"), "w") as fake_stdout:
+        with contextlib.redirect_stdout(fake_stdout):
+            stream = logging.StreamHandler(fake_stdout)
+            stream.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            file = logging.FileHandler(os.path.join(tmp, "before.log"))
+            file.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            configure(root, [file, stream])
+            before = run(before_request, args.requests, args.threads, args.prints)
+
+            log_queue = queue.SimpleQueue()
+            stream = logging.StreamHandler(fake_stdout)
+            file = logging.FileHandler(os.path.join(tmp, "after.log"))
+            for handler in (stream, file):
+                handler.setFormatter(JsonFormatter())
+            listener = QueueListener(log_queue, stream, file, respect_handler_level=True)
+            listener.start()
+            configure(root, [DeferredFormatQueueHandler(log_queue)])
+            after = run(after_request, args.requests, args.threads, args.prints)
+            drain_start = time.perf_counter()
+            listener.stop()
+            drain = time.perf_counter() - drain_start
+            configure(root, [])
+
+    print(f"{args.requests} requests, {args.prints} prints/request, {args.threads} threads", file=report)
+    for name, (mean, p99) in (("sync handlers + prints (before)", before), ("queue + debug logs (after)", after)):
+        print(f"  {name:<32} mean {mean:8.1f} us/request   p99 {p99:8.1f} us", file=report)
+    print(f"  {'listener drain after the run':<32} {drain * 1000:8.1f} ms (off the request path)", file=report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Login throughput with bcrypt verified inline on the event loop (previous
+behaviour) versus app.core.security.authenticate_user_async, which offloads
+it to the app's bounded password_executor.
+
+    PASSWORD_HASH_WORKERS=4 python -m benchmarks.bench_password_hashing --logins 40
+
+Both variants look the user up on an AsyncSession over a temporary SQLite
+file and check the password with the app's pwd_context, so only where bcrypt
+runs changes. The executor is created when app.core.security is imported:
+size it with PASSWORD_HASH_WORKERS, as the server does.
+
+Besides logins/s it reports the longest event-loop stall seen by a ticker
+coroutine, which is what every other request on the worker experiences.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.crud.project  # noqa: F401  Registra todos los modelos relacionados en SQLModel.metadata
+from app.core.config import settings
+from app.core.security import authenticate_user_async, get_password_hash, pwd_context
+from app.models.user import User, UserOut, UserRole
+
+USERNAME = "bench"
+PASSWORD = "s3cret-password"
+
+
+async def _ticker(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Devuelve el mayor retraso observado entre dos ticks del event loop."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(login, logins: int) -> tuple[float, float]:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return logins / elapsed, await ticker
+
+
+async def _inline_authenticate(session: AsyncSession, username: str, password: str) -> UserOut:
+    """authenticate_user_async con la verificación de bcrypt en el propio event loop, como antes."""
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user or not pwd_context.verify(password, user.password):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return UserOut.model_validate(user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="concurrent login attempts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_password_hashing.db")
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine, tables=[User.__table__])
+        with Session(engine) as session:
+            session.add(User(name="Bench", username=USERNAME, email="bench@test", password=get_password_hash(PASSWORD),
+                             role=UserRole.ADMIN, phone="600000000"))
+            session.commit()
+        engine.dispose()
+
+        async def scenario(authenticate) -> tuple[float, float]:
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+            async def login():
+                async with AsyncSession(async_engine) as session:
+                    await authenticate(session, USERNAME, PASSWORD)
+
+            try:
+                return await _run(login, args.logins)
+            finally:
+                await async_engine.dispose()
+
+        print(f"{args.logins} concurrent logins, bcrypt rounds={pwd_context.handler().default_rounds}, "
+              f"password_executor workers={settings.PASSWORD_HASH_WORKERS}")
+        for name, authenticate in (("inline (before)", _inline_authenticate),
+                                   ("executor (after)", authenticate_user_async)):
+            throughput, stall = asyncio.run(scenario(authenticate))
+            print(f"  {name:<18} {throughput:8.1f} logins/s   max event-loop stall {stall * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Synthetic data for benchmarks and load tests: users with their admin/worker/client
+profiles, follows, projects with clients and team, tasks, expenses (with their
+ProjectExpenseLink), inventory and activities, generated at configurable volumes.
+
+    python -m benchmarks.seed --database-url sqlite:////tmp/seed.db --reset \\
+        --admins 1000 --projects 50000 --activities-per-project 100
+
+Rows are written with batched Core INSERTs (--batch-size rows per statement,
+one commit per chunk of projects), so memory stays flat whatever the volume.
+Ids are assigned here, consecutively after the current maximum of each table,
+instead of read back with RETURNING (which SQLAlchemy runs row by row on SQLite
+when the order must be kept); the seeder must be the only writer while it runs.
+Everything derives from --seed and a fixed base date: the same arguments on an
+empty database give the same rows and ids. Every user is called <role><n>
+(admin0, client0, worker0...) and shares --password.
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.activity import EXPENSE_ACTIVITY_TYPES, Activity, ActivityType, ActivityUnreadCounter
+from app.models.expense import Expense, ExpenseCategory, ExpenseStatus
+from app.models.inventory import InventoryCategory, InventoryItem, InventoryStatus
+from app.models.project import Project, ProjectStatus
+from app.models.project_client import ProjectClient
+from app.models.project_expense import ProjectExpenseLink
+from app.models.project_team import ProjectTeamLink
+from app.models.task import Task, TaskStatus
+from app.models.user import (Admin, AvailabilityWorker, Client, Follow, FollowStatus, User, UserRole, Worker,
+                             WorkerSkill)
+
+BASE_DATE = datetime(2024, 1, 1)
+SKILLS = ("Albañilería", "Pintura", "Fontanería", "Electricidad", "Carpintería", "Alicatado")
+SPECIALTIES = ("Paleta", "Pintor", "Fontanero", "Electricista", "Carpintero")
+CITIES = ("Barcelona", "Madrid", "Valencia", "Sevilla", "Bilbao", "Girona")
+UNITS = ("kg", "m2", "l", "ud", "m")
+
+
+@dataclass
+class SeedVolumes:
+    admins: int = 10
+    clients: int = 100
+    workers: int = 200
+    projects: int = 500
+    clients_per_project: int = 1
+    team_size: int = 5
+    tasks_per_project: int = 20
+    expenses_per_project: int = 20
+    items_per_project: int = 10
+    activities_per_project: int = 50
+
+
+def insert_rows(session: Session, model: type[SQLModel], rows: List[dict], batch_size: int):
+    """
+    executemany por lotes de `batch_size` filas sobre la tabla (Core): el INSERT en lote del ORM
+    omite las claves con None y parte el lote cada vez que cambian las columnas presentes.
+    """
+    for start in range(0, len(rows), batch_size):
+        session.execute(insert(model.__table__), rows[start:start + batch_size])
+
+
+def allocate_ids(session: Session, model: type[SQLModel], count: int) -> range:
+    """Siguientes `count` ids de la tabla, consecutivos tras el máximo que había al empezar."""
+    next_ids = session.info.setdefault("seed_next_ids", {})
+    if model not in next_ids:
+        next_ids[model] = (session.scalar(select(func.max(model.id))) or 0) + 1
+    ids = range(next_ids[model], next_ids[model] + count)
+    next_ids[model] += count
+    return ids
+
+
+def insert_ids(session: Session, model: type[SQLModel], rows: List[dict], batch_size: int) -> List[int]:
+    """Como insert_rows pero asignando los ids; los devuelve en el orden de `rows`."""
+    ids = list(allocate_ids(session, model, len(rows)))
+    for row_id, row in zip(ids, rows):
+        row["id"] = row_id
+    insert_rows(session, model, rows, batch_size)
+    return ids
+
+
+def moment(rng: random.Random, days: int = 365) -> datetime:
+    return BASE_DATE + timedelta(seconds=rng.randrange(days * 86400))
+
+
+def seed_users(session: Session, rng: random.Random, volumes: SeedVolumes, password: str,
+               batch_size: int) -> Dict[UserRole, List[tuple[int, int]]]:
+    """Usuarios y su perfil de rol; devuelve (user_id, profile_id) por rol."""
+    profiles = {}
+    roles = ((UserRole.ADMIN, volumes.admins, Admin),
+             (UserRole.CLIENT, volumes.clients, Client),
+             (UserRole.WORKER, volumes.workers, Worker))
+    for index, (role, count, model) in enumerate(roles):
+        users = [{
+            "name": f"{role.value.title()} {n}",
+            "username": f"{role.value}{n}",
+            "email": f"{role.value}{n}@seed.test",
+            "password": password,
+            "role": role,
+            "language_preference": "es",
+            "phone": f"6{index}{n:08d}",
+            "location": rng.choice(CITIES),
+            "is_deleted": False,
+            "created_at": moment(rng),
+        } for n in range(count)]
+        user_ids = insert_ids(session, User, users, batch_size)
+
+        rows = [{"user_id": user_id, "is_deleted": False} for user_id in user_ids]
+        if role == UserRole.WORKER:
+            for row in rows:
+                row.update(specialty=rng.choice(SPECIALTIES), availability=rng.choice(list(AvailabilityWorker)))
+        elif role == UserRole.CLIENT:
+            for row in rows:
+                row["budget_limit"] = rng.randrange(10_000, 500_000, 1_000)
+        profiles[role] = list(zip(user_ids, insert_ids(session, model, rows, batch_size)))
+
+    insert_rows(session, WorkerSkill, [
+        {"worker_id": worker_id, "name": skill}
+        for _, worker_id in profiles[UserRole.WORKER]
+        for skill in rng.sample(SKILLS, rng.randint(1, 3))
+    ], batch_size)
+
+    # Clientes y trabajadores siguen a un admin; una parte queda como solicitud pendiente
+    if profiles[UserRole.ADMIN]:
+        follows = []
+        for user_id, _ in profiles[UserRole.CLIENT] + profiles[UserRole.WORKER]:
+            created_at = moment(rng)
+            follows.append({
+                "follower_id": user_id,
+                "following_id": rng.choice(profiles[UserRole.ADMIN])[0],
+                "status": FollowStatus.PENDING if rng.random() < 0.1 else FollowStatus.ACCEPTED,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        insert_rows(session, Follow, follows, batch_size)
+    session.commit()
+    return profiles
+
+
+def seed_projects(session: Session, rng: random.Random, volumes: SeedVolumes,
+                  profiles: Dict[UserRole, List[tuple[int, int]]], first: int, count: int, batch_size: int):
+    """
+    Proyectos `first`..`first + count` con todo su contenido. Cada proyecto se genera
+    entero antes del siguiente, así el resultado no depende de cómo se agrupan en lotes.
+    """
+    admins, clients, workers = (profiles[role] for role in (UserRole.ADMIN, UserRole.CLIENT, UserRole.WORKER))
+    rows: Dict[type[SQLModel], List[dict]] = {model: [] for model in (
+        Project, ProjectClient, ProjectTeamLink, Task, Expense, ProjectExpenseLink, InventoryItem, Activity,
+        ActivityUnreadCounter
+    )}
+
+    for n, project_id in zip(range(first, first + count), allocate_ids(session, Project, count)):
+        start_date = moment(rng)
+        # Los primeros proyectos van uno a cada admin y cliente: todos tienen al menos uno
+        admin_user_id, admin_id = admins[n] if n < len(admins) else rng.choice(admins)
+        title = f"Proyecto {n}"
+        rows[Project].append({
+            "id": project_id, "title": title, "description": f"Reforma en {rng.choice(CITIES)}",
+            "admin_id": admin_id, "limit_budget": float(rng.randrange(5_000, 500_000, 500)),
+            "location": rng.choice(CITIES), "start_date": start_date,
+            "end_date": start_date + timedelta(days=rng.randint(30, 365)), "status": ProjectStatus.ACTIVE,
+            "created_at": start_date, "updated_at": start_date,
+        })
+
+        project_clients = rng.sample(clients, min(volumes.clients_per_project, len(clients)))
+        if project_clients and n < len(clients) and clients[n] not in project_clients:
+            project_clients[0] = clients[n]
+        rows[ProjectClient] += [{"project_id": project_id, "client_id": client_id, "created_at": start_date}
+                                for _, client_id in project_clients]
+        members = rng.sample(workers, min(volumes.team_size, len(workers)))
+        rows[ProjectTeamLink] += [{"project_id": project_id, "worker_id": worker_id, "role": rng.choice(SPECIALTIES)}
+                                  for _, worker_id in members]
+
+        # Las actividades apuntan a tareas, gastos e items del propio proyecto
+        targets = {
+            "task_id": allocate_ids(session, Task, volumes.tasks_per_project if members else 0),
+            "expense_id": allocate_ids(session, Expense, volumes.expenses_per_project),
+            "inventory_item_id": allocate_ids(session, InventoryItem, volumes.items_per_project),
+        }
+        for i, task_id in enumerate(targets["task_id"]):
+            created_at = start_date + timedelta(hours=rng.randrange(24 * 30))
+            rows[Task].append({
+                "id": task_id, "project_id": project_id, "admin_id": admin_id, "worker_id": rng.choice(members)[1],
+                "title": f"Tarea {i}", "description": None, "status": rng.choice(list(TaskStatus)),
+                "created_at": created_at, "updated_at": created_at,
+                "due_date": created_at + timedelta(days=rng.randint(1, 60)),
+            })
+        for i, expense_id in enumerate(targets["expense_id"]):
+            created_at = start_date + timedelta(hours=rng.randrange(24 * 90))
+            rows[Expense].append({
+                "id": expense_id, "title": f"Gasto {i}", "project_id": project_id, "expense_date": created_at,
+                "category": rng.choice(list(ExpenseCategory)), "description": "Gasto generado",
+                "amount": round(rng.uniform(10, 5_000), 2), "status": rng.choice(list(ExpenseStatus)),
+                "created_at": created_at, "updated_at": created_at,
+            })
+            rows[ProjectExpenseLink].append({"project_id": project_id, "expense_id": expense_id, "notes": None,
+                                             "updated_at": created_at})
+        for i, item_id in enumerate(targets["inventory_item_id"]):
+            total = rng.randint(1, 500)
+            used = rng.randint(0, total)
+            rows[InventoryItem].append({
+                "id": item_id, "name": f"Material {i}", "category": rng.choice(list(InventoryCategory)),
+                "total": total, "used": used, "remaining": total - used, "unit": rng.choice(UNITS),
+                "unit_cost": round(rng.uniform(0.5, 200), 2), "supplier": f"Proveedor {rng.randrange(50)}",
+                "status": rng.choice(list(InventoryStatus)), "project_id": project_id,
+            })
+
+        visible_to_clients = 0
+        for _ in range(volumes.activities_per_project):
+            activity_type = rng.choice(list(ActivityType))
+            key = ("task_id" if activity_type.value.startswith("task")
+                   else "expense_id" if activity_type in EXPENSE_ACTIVITY_TYPES else "inventory_item_id")
+            rows[Activity].append({
+                "project_id": project_id, "task_id": None, "expense_id": None, "inventory_item_id": None,
+                key: rng.choice(targets[key]) if targets[key] else None,
+                "activity_type": activity_type, "title_project": title, "is_read": False, "dispatched": True,
+                "created_at": start_date + timedelta(minutes=rng.randrange(60 * 24 * 120)),
+                "metadatas": {"title": f"Actividad {activity_type.value}"},
+            })
+            visible_to_clients += activity_type not in EXPENSE_ACTIVITY_TYPES
+        # Contadores de no leídas coherentes con ActivityService.unread_increments
+        if volumes.activities_per_project:
+            rows[ActivityUnreadCounter].append({"user_id": admin_user_id, "project_id": project_id,
+                                                "unread_count": volumes.activities_per_project})
+            rows[ActivityUnreadCounter] += [
+                {"user_id": user_id, "project_id": project_id, "unread_count": visible_to_clients}
+                for user_id, _ in project_clients
+            ]
+
+    # Por orden de dependencias (claves foráneas)
+    for model, model_rows in rows.items():
+        insert_rows(session, model, model_rows, batch_size)
+    session.commit()
+
+
+def seed_database(engine: Engine, volumes: SeedVolumes, seed: int = 0, batch_size: int = 5_000,
+                  password: str = "secret", progress=None) -> Dict[str, int]:
+    """Genera `volumes` en `engine` y devuelve cuántas filas ha creado de las tablas principales."""
+    if volumes.projects and not (volumes.admins and volumes.workers):
+        raise ValueError("Projects need at least one admin and one worker")
+    rng = random.Random(seed)
+    # Cada fila de un proyecto: clientes, equipo, tareas, gastos y su enlace, items y actividades
+    rows_per_project = 1 + volumes.clients_per_project + volumes.team_size + volumes.tasks_per_project \
+        + 2 * volumes.expenses_per_project + volumes.items_per_project + volumes.activities_per_project
+    chunk = max(1, batch_size // rows_per_project)
+
+    with Session(engine) as session:
+        profiles = seed_users(session, rng, volumes, get_password_hash(password), batch_size)
+        for first in range(0, volumes.projects, chunk):
+            seed_projects(session, rng, volumes, profiles, first, min(chunk, volumes.projects - first), batch_size)
+            if progress:
+                progress(min(first + chunk, volumes.projects), volumes.projects)
+
+    return {
+        "users": volumes.admins + volumes.clients + volumes.workers,
+        "projects": volumes.projects,
+        "tasks": volumes.projects * volumes.tasks_per_project,
+        "expenses": volumes.projects * volumes.expenses_per_project,
+        "inventory_items": volumes.projects * volumes.items_per_project,
+        "activities": volumes.projects * volumes.activities_per_project,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=str(settings.SQLALCHEMY_URI),
+                        help="database to seed (default: the configured one)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="rows per INSERT")
+    parser.add_argument("--password", default="secret", help="password of every generated user")
+    defaults = SeedVolumes()
+    for field in SeedVolumes.__dataclass_fields__:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(defaults, field))
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    volumes = SeedVolumes(**{field: getattr(args, field) for field in SeedVolumes.__dataclass_fields__})
+    start = last = time.perf_counter()
+
+    def progress(done: int, total: int):
+        nonlocal last
+        if done == total or time.perf_counter() - last >= 1:
+            last = time.perf_counter()
+            print(f"\r  projects {done}/{total}  {last - start:7.1f}s", end="", flush=True)
+
+    counts = seed_database(engine, volumes, seed=args.seed, batch_size=args.batch_size,
+                           password=args.password, progress=progress)
+    elapsed = time.perf_counter() - start
+    print(f"\nSeeded {engine.url.render_as_string(hide_password=True)} in {elapsed:.1f}s")
+    for table, rows in counts.items():
+        print(f"  {table:<16} {rows:>10}")
+
+
+if __name__ == "__main__":
+    main()